@@ -0,0 +1,230 @@
+# Micro-benchmarks for the bill list hot paths. Run with `python benchmarks.py`
+# from a desktop checkout; it needs the same dependencies as main.py and works
+# in a throwaway directory so the real bills store is never touched.
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, REPO_DIR)
+os.chdir(tempfile.mkdtemp(prefix='bills_bench_'))
+
+import datetime
+
+from kivy.app import App
+from kivy.clock import Clock
+
+import main
+
+
+def make_bills(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime.date.today().toordinal() - 365
+    categories = list(main.BILL_CATEGORIES)
+    frequencies = ['Weekly', '4 Weekly', 'Monthly', 'Custom']
+    return [
+        main.Bill(
+            main.new_bill_id(),
+            f"Bill {i} {rng.choice(['Gas', 'Water', 'Phone', 'Council Tax', 'Gym'])}",
+            rng.randint(100, 200000),
+            rng.random() < 0.4,
+            start + rng.randint(0, 3 * 365),
+            rng.choice(categories),
+            rng.choice(frequencies)
+        )
+        for i in range(count)
+    ]
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main_screen(bills):
+    app = main.BillsManagerApp()
+    App._running_app = app
+    app.root = app.build()
+    screen = app.root.get_screen('main')
+    screen.notify = lambda title, message, group=None: None
+    screen.ledger.reset(bills)
+    return screen
+
+
+def bench_update_view(count=5000):
+    # Every month expanded except the one being toggled, so the list holds
+    # close to `count` rows
+    screen = main_screen(make_bills(count))
+    today = datetime.date.today()
+    month = (today.year, today.month)
+    screen.expanded_months = {main.month_key(b.due_ordinal) for b in screen.bills}
+    rv = screen.ids.rv
+    screen.update_view()
+    rv.refresh_views()
+
+    def toggle():
+        screen.expanded_months ^= {month}
+        screen.update_view()
+        rv.refresh_views()
+
+    def toggle_full():
+        screen.view_model.reset()
+        rv.data = []
+        toggle()
+
+    bill = screen.bills[0]
+
+    def edit():
+        screen.ledger.update(bill, paid=not bill.paid)
+        screen.update_view()
+        rv.refresh_views()
+
+    def edit_full():
+        screen.view_model.reset()
+        rv.data = []
+        edit()
+
+    print(f"update_view, {count} bills")
+    print(f"  toggle month, full rebuild: {timed(toggle_full):8.2f} ms")
+    print(f"  toggle month, diffed:       {timed(toggle):8.2f} ms")
+    print(f"  edit one bill, full rebuild:{timed(edit_full):8.2f} ms")
+    print(f"  edit one bill, diffed:      {timed(edit):8.2f} ms")
+
+
+def linear_filter(bills, search_text):
+    # The per-bill scan update_view used before the trigram index
+    return [
+        b for b in bills
+        if (search_text in b.name.lower() or
+            search_text in str(b.amount).lower() or
+            search_text in b.due.lower() or
+            search_text in b.frequency.lower() or
+            search_text in b.category.lower())
+    ]
+
+
+def bench_search(count=50000):
+    bills = make_bills(count)
+    index = main.TrigramIndex()
+    ledger = main.BillLedger([index])
+    started = time.perf_counter()
+    ledger.reset(bills)
+    reset_ms = (time.perf_counter() - started) * 1000
+    # Postings are built on a worker thread and installed from the clock
+    while index.postings is None:
+        Clock.tick()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    print(f"search, {count} bills (reset in {reset_ms:.0f} ms, index ready in {build_ms:.0f} ms)")
+    for query in ['bill 4217', 'council', 'gym', '/2027', 'ut', '7']:
+        expected = {b.id for b in linear_filter(bills, query)}
+        assert index.search(query) == expected, query
+        linear_ms = timed(lambda: linear_filter(bills, query))
+        index_ms = timed(lambda: index.search(query))
+        print(f"  {query!r:12} {len(expected):6} hits  linear {linear_ms:8.2f} ms  index {index_ms:8.3f} ms")
+
+
+def run_python(code):
+    # Runs `code` in a fresh interpreter; it prints its own elapsed milliseconds
+    result = subprocess.run(
+        [sys.executable, '-c', 'import time\nstarted = time.perf_counter()\n' + code +
+         '\nprint((time.perf_counter() - started) * 1000)'],
+        check=True, capture_output=True, text=True,
+        env=dict(os.environ, KIVY_NO_CONSOLELOG='1')
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def bench_holiday_startup(repeat=5):
+    # Cold start as the app sees it: a fresh interpreter imports main and asks
+    # the calendar about today, with the holiday cache file on disk and without
+    # it. The old code instead imported `holidays` and built ten years of dates
+    # on every import; that build alone is timed for comparison.
+    year = datetime.date.today().year
+    old = (
+        "import holidays\n"
+        f"uk_holidays = holidays.UnitedKingdom(years=range({year}, {year} + 10))\n"
+        "BANK_HOLIDAYS = [d.strftime('%d/%m') for d in uk_holidays]"
+    )
+    import_only = f"import sys\nsys.path.insert(0, {REPO_DIR!r})\nimport main"
+    first_lookup = (
+        import_only + "\nimport datetime\n"
+        "main.business_days.is_business_day(datetime.date.today().toordinal())"
+    )
+    cached = first_lookup + "\nassert 'holidays' not in sys.modules"
+
+    def uncached():
+        if os.path.exists(main.HOLIDAY_CACHE_FILE):
+            os.remove(main.HOLIDAY_CACHE_FILE)
+        return run_python(first_lookup)
+
+    print("holiday calendar at startup (import main + first lookup)")
+    print(f"  import main alone:       {min(run_python(import_only) for _ in range(repeat)):8.2f} ms")
+    print(f"  no cache file:           {min(uncached() for _ in range(repeat)):8.2f} ms")
+    # The last uncached run left the current year in the cache file
+    print(f"  cache file present:      {min(run_python(cached) for _ in range(repeat)):8.2f} ms")
+    print(f"  old eager 10-year build: {min(run_python(old) for _ in range(repeat)):8.2f} ms (holidays only)")
+
+
+def write_statements(directory, files, rows):
+    paths = []
+    for month in range(files):
+        path = os.path.join(directory, f"statement_{month + 1:02d}.csv")
+        with open(path, 'w', newline='') as f:
+            f.write("Name,Amount,Paid,Due,Category,Frequency\n")
+            for i in range(rows):
+                f.write(f"Bill {i},{i % 500 + 1}.25,False,{i % 28 + 1:02d}/{month % 12 + 1:02d}/2026,Rent,Monthly\n")
+        paths.append(path)
+    return paths
+
+
+def bench_import_files(files=12, rows=20000):
+    paths = write_statements(tempfile.mkdtemp(prefix='statements_', dir='.'), files, rows)
+
+    # A dry-run preview reads and validates exactly as an import does without
+    # touching storage; run() takes the pooled path whenever a pool is worth it
+    def preview(pooled):
+        task = main.ImportPreview(paths, {}, set(), print, lambda *args: None)
+        if pooled:
+            task.run()
+        else:
+            for path in paths:
+                task.import_file(path)
+        return task.counts
+
+    pool = main.import_pool(len(paths))
+    print(f"import {files} statement files x {rows} rows ({os.cpu_count()} cores)")
+    print(f"  streamed: {timed(lambda: preview(False), repeat=3):8.0f} ms")
+    if pool is None:
+        print("  pool:     not available here, imports stream one file at a time")
+        return
+    pool[0].shutdown()
+    assert preview(True) == preview(False)
+    print(f"  pool:     {timed(lambda: preview(True), repeat=3):8.0f} ms")
+
+
+def bench_forecast(series=500, months=60):
+    bills = [b for b in make_bills(series * 2) if b.frequency != 'Custom'][:series]
+    forecast = main.CashFlowForecast(main.business_days, datetime.date.today().toordinal(), months)
+    assert forecast.project(bills, vectorized=True) == forecast.project(bills, vectorized=False)
+    occurrences = forecast.project(bills)['count']
+    print(f"forecast {months} months for {len(bills)} recurring bills ({occurrences} occurrences)")
+    print(f"  python loop: {timed(lambda: forecast.project(bills, vectorized=False)):8.2f} ms")
+    if main.numpy is not None:
+        print(f"  numpy:       {timed(lambda: forecast.project(bills, vectorized=True)):8.2f} ms")
+
+
+if __name__ == '__main__':
+    bench_update_view()
+    bench_search()
+    bench_holiday_startup()
+    bench_import_files()
+    bench_forecast()
@@ -1,9 +1,7 @@
-<<<<<<< HEAD
 import sys
 from kivy.app import App
 from kivy.lang import Builder
 from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.properties import ListProperty
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.popup import Popup
 from kivy.storage.jsonstore import JsonStore
@@ -12,23 +10,45 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.button import Button
 from kivy.uix.spinner import Spinner
 from kivy.uix.label import Label
+from kivy.uix.checkbox import CheckBox
 from kivy.uix.floatlayout import FloatLayout
 from kivy.animation import Animation
 from kivy.metrics import dp
 from kivy.graphics import Color, Rectangle
 from plyer import notification
-from functools import partial
+from functools import partial, lru_cache
 import csv
+import gzip
 import os
 import datetime
 from collections import defaultdict
 from kivy.utils import platform, get_color_from_hex
 import re
+import bisect
+import shutil
 import hashlib
-import holidays
+import heapq
+import json
+import threading
+import uuid
 from kivy.clock import Clock
 import locale
+import time
 import traceback
+from abc import ABC, abstractmethod
+import multiprocessing
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Set locale for currency and date formatting
 try:
@@ -42,13 +62,682 @@ except:
 
 # Data storage
 STORE_FILE = "bills_store.json"
-store = JsonStore(STORE_FILE)
+DB_FILE = "bills_store.db"
+SNAPSHOT_FILE = "bills_snapshot.json"
+JOURNAL_FILE = "bills_journal.jsonl"
+JOURNAL_COMPACT_BYTES = 256 * 1024
 DEFAULT_PIN = "1234"
+SEARCH_DEBOUNCE_SECONDS = 0.25
+REMINDER_LEAD_SECONDS = 86400
+REMINDER_DIGEST_NAMES = 5
+NOTIFY_COALESCE_SECONDS = 0.5
+NOTIFY_MIN_INTERVAL_SECONDS = 1.0
+NOTIFY_MAX_PER_FLUSH = 3
+TOAST_SECONDS = 2
+IMPORT_CHUNK_ROWS = 500
+IMPORT_REFRESH_SECONDS = 1.0
+IMPORT_DUPLICATE_POLICIES = ('skip', 'merge', 'replace')
+IMPORT_PREVIEW_SAMPLE_ROWS = 200
+IMPORT_PREVIEW_PAGE_ROWS = 10
+IMPORT_EXTENSIONS = ('.csv', '.txt')
+IMPORT_PARALLEL_MIN_FILES = 4
+IMPORT_PARALLEL_AHEAD = 2
+EXPORT_FILE_PREFIX = "bills_export"
+EXPORT_FORMATS = {'CSV': '.csv', 'CSV (gzip)': '.csv.gz', 'JSONL': '.jsonl'}
+EXPORT_COLUMNS = ["Name", "Amount", "Paid", "Due", "Category", "Frequency"]
+EXPORT_BATCH_ROWS = 1000
+BACKUP_DIR_NAME = "bills_backups"
+BACKUP_KEEP_DAILY = 7
+BACKUP_KEEP_WEEKLY = 4
+BACKUP_KEEP_MONTHLY = 12
+BACKUP_LEGACY_PREFIX = "bills_backup_"
+RESTORE_BATCH_ROWS = 1000
+RESTORE_READ_BYTES = 64 * 1024
+PAY_DAY = 25
+SUMMARY_RANGES = ('All Time', 'This Week', 'This Pay Period', 'This Quarter', 'Custom')
+ANALYTICS_VIEWS = ('By Category', 'Monthly Trend', 'Top Categories', 'Forecast: 12 Months', 'Forecast: 5 Years')
+ANALYTICS_TREND_MONTHS = 12
+ANALYTICS_TOP_CATEGORIES = 5
+FORECAST_STEP_DAYS = {'Weekly': 7, '4 Weekly': 28}
+FORECAST_FREQUENCIES = ('Weekly', '4 Weekly', 'Monthly')
+FORECAST_ROLL_MARGIN_DAYS = 14
+
+
+def new_bill_id():
+    return uuid.uuid4().hex
+
+
+@lru_cache(maxsize=4096)
+def due_ordinal(due):
+    return datetime.datetime.strptime(due, '%d/%m/%Y').toordinal()
+
+
+DUE_DATE_PATTERN = re.compile(r'^\d{2}/\d{2}/\d{4}$')
+BILL_REQUIRED_FIELDS = ('name', 'amount', 'due', 'paid', 'category')
+
+
+class Bill:
+    # In-memory bill record. The due date is held as a date ordinal and the
+    # amount in minor units (pence/cents), so sorting, grouping and overdue
+    # checks never re-parse strings. to_dict/from_dict map to the stored shape.
+    __slots__ = ('id', 'name', 'amount_minor', 'paid', 'due_ordinal', 'category', 'frequency')
+
+    def __init__(self, id, name, amount_minor, paid, due_ordinal, category, frequency=''):
+        self.id = id
+        self.name = name
+        self.amount_minor = amount_minor
+        self.paid = paid
+        self.due_ordinal = due_ordinal
+        self.category = sys.intern(category)
+        self.frequency = sys.intern(frequency)
+
+    @property
+    def amount(self):
+        return self.amount_minor / 100
+
+    @property
+    def due_date(self):
+        return datetime.date.fromordinal(self.due_ordinal)
+
+    @property
+    def due(self):
+        d = datetime.date.fromordinal(self.due_ordinal)
+        return f"{d.day:02d}/{d.month:02d}/{d.year:04d}"
+
+    def is_overdue(self, today_ordinal):
+        # Matches the old `due_date < datetime.now()` check, so a bill is overdue on its due day
+        return not self.paid and self.due_ordinal <= today_ordinal
+
+    @classmethod
+    def from_dict(cls, data):
+        if not all(k in data for k in BILL_REQUIRED_FIELDS):
+            raise ValueError("invalid bill")
+        if not isinstance(data['amount'], (int, float)) or not isinstance(data['due'], str):
+            raise ValueError("invalid bill")
+        if not DUE_DATE_PATTERN.match(data['due']):
+            raise ValueError("invalid bill date")
+        try:
+            ordinal = due_ordinal(data['due'])
+        except ValueError:
+            raise ValueError("invalid bill date")
+        return cls(
+            data.get('id') or new_bill_id(),
+            data['name'],
+            round(data['amount'] * 100),
+            bool(data['paid']),
+            ordinal,
+            data['category'],
+            data.get('frequency') or ''
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'amount': self.amount,
+            'paid': self.paid,
+            'due': self.due,
+            'category': self.category,
+            'frequency': self.frequency
+        }
+
+    def copy(self):
+        return Bill(self.id, self.name, self.amount_minor, self.paid, self.due_ordinal, self.category, self.frequency)
+
+
+class BillStorage(ABC):
+    # Common interface for the storage backends. Bills go in and come out in the
+    # same dict shape the app has always kept in bills_store.json, plus an 'id'.
+    @abstractmethod
+    def load_bills(self):
+        pass
+
+    def iter_bills(self, batch_size=EXPORT_BATCH_ROWS):
+        # Bills one at a time for long readers such as exports; backends
+        # override this to avoid building the whole list
+        yield from self.load_bills()
+
+    def count_bills(self):
+        return len(self.load_bills())
+
+    @abstractmethod
+    def add_bill(self, bill):
+        pass
+
+    @abstractmethod
+    def update_bill(self, bill):
+        pass
+
+    @abstractmethod
+    def set_paid(self, bill_id, paid):
+        pass
+
+    @abstractmethod
+    def delete_bill(self, bill_id):
+        pass
+
+    @abstractmethod
+    def put_bills(self, bills):
+        pass
+
+    @abstractmethod
+    def restore_bills(self, batches):
+        # Replaces every bill with those from an iterable of batches. If the
+        # iterable raises part way the stored bills are left as they were.
+        pass
+
+    @abstractmethod
+    def get_setting(self, key, default=None):
+        pass
+
+    @abstractmethod
+    def put_setting(self, key, value):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonStoreBillReader:
+    # Read-only view of the legacy single-blob store, for migrating installs
+    # that predate the other backends. Bills saved without an id get one here,
+    # and the backend they are migrated into is what keeps it.
+    def __init__(self, path=STORE_FILE):
+        self.store = JsonStore(path)
+
+    def load_bills(self):
+        bills = self.store.get('bills')['data'] if self.store.exists('bills') else []
+        return [dict(b, id=b.get('id') or new_bill_id()) for b in bills if isinstance(b, dict)]
+
+    def get_setting(self, key, default=None):
+        return self.store.get(key)['value'] if self.store.exists(key) else default
+
+
+class SqliteBillStorage(BillStorage):
+    # One row per bill so every add, edit, toggle and delete is a single-row write
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS bills (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL,
+            paid INTEGER NOT NULL DEFAULT 0,
+            due TEXT NOT NULL,
+            due_ordinal INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            frequency TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_bills_due ON bills (due_ordinal);
+        CREATE INDEX IF NOT EXISTS idx_bills_paid ON bills (paid);
+        CREATE INDEX IF NOT EXISTS idx_bills_category ON bills (category);
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    '''
+    STAGING_SCHEMA = '''
+        CREATE TEMP TABLE IF NOT EXISTS bills_restore (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            amount REAL NOT NULL,
+            paid INTEGER NOT NULL,
+            due TEXT NOT NULL,
+            due_ordinal INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            frequency TEXT NOT NULL
+        )
+    '''
+    UPSERT = '''
+        INSERT INTO bills (id, name, amount, paid, due, due_ordinal, category, frequency)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name, amount = excluded.amount, paid = excluded.paid,
+            due = excluded.due, due_ordinal = excluded.due_ordinal,
+            category = excluded.category, frequency = excluded.frequency
+    '''
+
+    def __init__(self, path=DB_FILE, legacy_path=STORE_FILE):
+        # The import worker commits from its own thread, so access is serialised
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self.migrate_legacy(legacy_path)
+
+    def migrate_legacy(self, legacy_path):
+        # One-off copy of the old JsonStore blob into the database
+        if self.get_setting('legacy_migrated') or not os.path.exists(legacy_path):
+            return
+        legacy = JsonStoreBillReader(legacy_path)
+        bills = [b for b in legacy.load_bills() if all(k in b for k in ['name', 'amount', 'due', 'paid', 'category'])]
+        with self.lock, self.conn:
+            self.conn.executemany(self.UPSERT, [self._row(b) for b in bills])
+            pin = legacy.get_setting('pin')
+            if pin is not None and self.get_setting('pin') is None:
+                self._put_setting('pin', pin)
+            self._put_setting('legacy_migrated', True)
+
+    def _row(self, b):
+        try:
+            ordinal = due_ordinal(b['due'])
+        except (TypeError, ValueError):
+            # Kept as-is; load_bills discards it the same way it always has
+            ordinal = 0
+        return (b['id'], b['name'], b['amount'], 1 if b['paid'] else 0, b['due'],
+                ordinal, b['category'], b.get('frequency', ''))
+
+    @staticmethod
+    def _bill(row):
+        return {
+            'id': row[0],
+            'name': row[1],
+            'amount': row[2],
+            'paid': bool(row[3]),
+            'due': row[4],
+            'category': row[5],
+            'frequency': row[6]
+        }
+
+    def load_bills(self):
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT id, name, amount, paid, due, category, frequency FROM bills ORDER BY rowid').fetchall()
+        return [self._bill(row) for row in rows]
+
+    def iter_bills(self, batch_size=EXPORT_BATCH_ROWS):
+        # Keyset pages by rowid: the lock is held per page only, so the UI and
+        # the import worker can keep writing while an export runs
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    'SELECT rowid, id, name, amount, paid, due, category, frequency FROM bills '
+                    'WHERE rowid > ? ORDER BY rowid LIMIT ?', (last, batch_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for row in rows:
+                yield self._bill(row[1:])
+
+    def count_bills(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM bills').fetchone()[0]
+
+    def add_bill(self, bill):
+        with self.lock, self.conn:
+            self.conn.execute(self.UPSERT, self._row(bill))
+
+    def update_bill(self, bill):
+        self.add_bill(bill)
+
+    def set_paid(self, bill_id, paid):
+        with self.lock, self.conn:
+            self.conn.execute('UPDATE bills SET paid = ? WHERE id = ?', (1 if paid else 0, bill_id))
+
+    def delete_bill(self, bill_id):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM bills WHERE id = ?', (bill_id,))
+
+    def put_bills(self, bills):
+        with self.lock, self.conn:
+            self.conn.executemany(self.UPSERT, [self._row(b) for b in bills])
+
+    def restore_bills(self, batches):
+        # Batches are staged in a temp table with the lock held per batch only,
+        # then swapped in by a single transaction once every batch has arrived
+        with self.lock:
+            self.conn.execute(self.STAGING_SCHEMA)
+            with self.conn:
+                self.conn.execute('DELETE FROM temp.bills_restore')
+        try:
+            for batch in batches:
+                with self.lock, self.conn:
+                    self.conn.executemany(
+                        'INSERT OR REPLACE INTO temp.bills_restore '
+                        '(id, name, amount, paid, due, due_ordinal, category, frequency) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [self._row(b) for b in batch])
+            with self.lock, self.conn:
+                self.conn.execute('DELETE FROM bills')
+                self.conn.execute(
+                    'INSERT INTO bills (id, name, amount, paid, due, due_ordinal, category, frequency) '
+                    'SELECT id, name, amount, paid, due, due_ordinal, category, frequency '
+                    'FROM temp.bills_restore ORDER BY rowid')
+        finally:
+            with self.lock, self.conn:
+                self.conn.execute('DELETE FROM temp.bills_restore')
+
+    def get_setting(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _put_setting(self, key, value):
+        self.conn.execute(
+            'INSERT INTO settings (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, json.dumps(value)))
+
+    def put_setting(self, key, value):
+        with self.lock, self.conn:
+            self._put_setting(key, value)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class JournalBillStorage(BillStorage):
+    # Snapshot plus append-only journal, used when sqlite3 is not bundled. Each
+    # mutation is one appended line; once the journal passes compact_bytes it is
+    # rotated out and folded into a new snapshot on a background thread.
+    def __init__(self, snapshot_path=SNAPSHOT_FILE, journal_path=JOURNAL_FILE,
+                 legacy_path=STORE_FILE, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.rotated_path = journal_path + '.compacting'
+        self.compact_bytes = compact_bytes
+        self.lock = threading.Lock()
+        self.compaction = None
+        self.bills = {}
+        self.settings = {}
+        self.replay(legacy_path)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        if os.path.exists(self.rotated_path):
+            # A compaction was interrupted; finish it before anything new is rotated
+            self.compact(self.snapshot_state())
+
+    def replay(self, legacy_path):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.bills = {b['id']: b for b in snapshot.get('bills', [])}
+            self.settings = snapshot.get('settings', {})
+        elif os.path.exists(legacy_path):
+            legacy = JsonStoreBillReader(legacy_path)
+            self.bills = {b['id']: b for b in legacy.load_bills()}
+            pin = legacy.get_setting('pin')
+            if pin is not None:
+                self.settings['pin'] = pin
+            # Ids given to legacy bills exist only in memory until written down,
+            # and journal records will refer to them
+            self.write_snapshot(self.snapshot_state())
+        for path in (self.rotated_path, self.journal_path):
+            if os.path.exists(path):
+                self.replay_journal(path)
+
+    def replay_journal(self, path):
+        valid_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write from a kill mid-append
+                    break
+                try:
+                    self.apply(json.loads(line))
+                except ValueError:
+                    break
+                valid_size += len(line)
+        if valid_size != os.path.getsize(path):
+            os.truncate(path, valid_size)
+
+    def apply(self, record):
+        # Stored dicts are replaced, never mutated, so snapshots can share them
+        op = record['op']
+        if op in ('add', 'update'):
+            self.bills[record['bill']['id']] = record['bill']
+        elif op == 'put':
+            for b in record['bills']:
+                self.bills[b['id']] = b
+        elif op == 'paid':
+            if record['id'] in self.bills:
+                self.bills[record['id']] = dict(self.bills[record['id']], paid=record['paid'])
+        elif op == 'delete':
+            self.bills.pop(record['id'], None)
+        elif op == 'clear':
+            self.bills = {}
+        elif op == 'setting':
+            self.settings[record['key']] = record['value']
+
+    def append(self, record):
+        with self.lock:
+            self.apply(record)
+            self.journal.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            if self.compaction is None and self.journal.tell() >= self.compact_bytes:
+                self.start_compaction()
+
+    def snapshot_state(self):
+        return {'bills': list(self.bills.values()), 'settings': dict(self.settings)}
+
+    def start_compaction(self):
+        # Called with the lock held: later appends land in a fresh journal file.
+        # A rotated journal left by a failed compaction is in no snapshot yet,
+        # so the live one is added to its end rather than replacing it. Records
+        # set whole values, so a kill before the truncate replays them twice
+        # to the same result.
+        self.journal.close()
+        if os.path.exists(self.rotated_path):
+            with open(self.journal_path, 'rb') as src, open(self.rotated_path, 'ab') as dst:
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            self.journal = open(self.journal_path, 'w', encoding='utf-8')
+        else:
+            os.replace(self.journal_path, self.rotated_path)
+            self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        self.compaction = threading.Thread(target=self.compact, args=(self.snapshot_state(),), daemon=True)
+        self.compaction.start()
+
+    def write_snapshot(self, state):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def compact(self, state):
+        try:
+            self.write_snapshot(state)
+            os.remove(self.rotated_path)
+        except Exception as e:
+            log_crash(e, source="journal_compact")
+        finally:
+            with self.lock:
+                self.compaction = None
+
+    def load_bills(self):
+        with self.lock:
+            return [dict(b) for b in self.bills.values()]
+
+    def iter_bills(self, batch_size=EXPORT_BATCH_ROWS):
+        # apply() replaces stored dicts rather than editing them, so a list of
+        # the current ones is a consistent view without copying each bill
+        with self.lock:
+            bills = list(self.bills.values())
+        yield from bills
+
+    def count_bills(self):
+        return len(self.bills)
+
+    def add_bill(self, bill):
+        self.append({'op': 'add', 'bill': dict(bill)})
+
+    def update_bill(self, bill):
+        self.append({'op': 'update', 'bill': dict(bill)})
+
+    def set_paid(self, bill_id, paid):
+        self.append({'op': 'paid', 'id': bill_id, 'paid': paid})
+
+    def delete_bill(self, bill_id):
+        self.append({'op': 'delete', 'id': bill_id})
+
+    def put_bills(self, bills):
+        self.append({'op': 'put', 'bills': [dict(b) for b in bills]})
+
+    def restore_bills(self, batches):
+        # The restored bills become a new snapshot and the journal starts over.
+        # The snapshot is written outside the lock; settings changed meanwhile
+        # are appended again after the swap so they are not lost with the journal.
+        staged = {}
+        for batch in batches:
+            for b in batch:
+                staged[b['id']] = dict(b)
+        settings = dict(self.settings)
+        tmp_path = self.snapshot_path + '.restore'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'bills': list(staged.values()), 'settings': settings}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        while True:
+            compaction = self.compaction
+            if compaction is not None:
+                compaction.join()
+            with self.lock:
+                if self.compaction is not None:
+                    continue
+                self.journal.close()
+                os.replace(tmp_path, self.snapshot_path)
+                if os.path.exists(self.rotated_path):
+                    # Left by a failed compaction; the new snapshot supersedes it
+                    os.remove(self.rotated_path)
+                self.journal = open(self.journal_path, 'w', encoding='utf-8')
+                self.bills = staged
+                for key, value in self.settings.items():
+                    if settings.get(key) != value:
+                        self.journal.write(json.dumps({'op': 'setting', 'key': key, 'value': value},
+                                                      separators=(',', ':')) + '\n')
+                self.journal.flush()
+                os.fsync(self.journal.fileno())
+                return
+
+    def get_setting(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def put_setting(self, key, value):
+        self.append({'op': 'setting', 'key': key, 'value': value})
+
+    def close(self):
+        compaction = self.compaction
+        if compaction is not None:
+            compaction.join()
+        self.journal.close()
+
+
+# Opened by BillsManagerApp.build, once crash logging and notifications exist
+storage = None
 
 # UK bank holidays
-current_year = datetime.datetime.now().year
-uk_holidays = holidays.UnitedKingdom(years=range(current_year, current_year + 10))
-BANK_HOLIDAYS = [d.strftime('%d/%m') for d in uk_holidays]
+HOLIDAY_REGION = "GB"
+HOLIDAY_CACHE_FILE = "holidays_cache.json"
+HOLIDAY_CACHE_MAX_AGE_DAYS = 180
+
+
+class HolidayCache:
+    # Holiday day ordinals per region and year, loaded the first time a year is
+    # needed. Years are read from HOLIDAY_CACHE_FILE; the `holidays` package is
+    # only imported on a miss, or when an entry is old enough that a newly
+    # announced bank holiday could be missing from it.
+    def __init__(self, region=HOLIDAY_REGION, path=HOLIDAY_CACHE_FILE):
+        self.region = region
+        self.path = path
+        self.entries = None
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def for_year(self, year):
+        if self.entries is None:
+            self.load()
+        key = f"{self.region}:{year}"
+        today = datetime.date.today().toordinal()
+        entry = self.entries.get(key)
+        if entry is None or today - entry['fetched'] > HOLIDAY_CACHE_MAX_AGE_DAYS:
+            try:
+                import holidays
+                days = sorted(d.toordinal() for d in holidays.country_holidays(self.region, years=[year]))
+            except Exception as e:
+                print(f"[ERROR] Holiday lookup failed for {key}: {str(e)}")
+                return entry['days'] if entry else []
+            entry = self.entries[key] = {'fetched': today, 'days': days}
+            try:
+                self.save()
+            except OSError as e:
+                print(f"[ERROR] Failed to write holiday cache: {str(e)}")
+        return entry['days']
+
+
+holiday_cache = HolidayCache()
+
+
+class BusinessCalendar:
+    # Working-day lookups on date ordinals. Each year is built once into a skip
+    # table: skip[i] is how many days day i of the year is from the next working
+    # day (0 when it is one), so both checks are a single table lookup.
+    def __init__(self, holidays_for_year):
+        self.holidays_for_year = holidays_for_year
+        self.years = {}
+
+    def year_table(self, year):
+        table = self.years.get(year)
+        if table is None:
+            start = datetime.date(year, 1, 1).toordinal()
+            days = datetime.date(year + 1, 1, 1).toordinal() - start
+            closed = bytearray(days)
+            for i in range(days):
+                # Ordinal 1 (01/01/0001) was a Monday
+                if (start + i - 1) % 7 >= 5:
+                    closed[i] = 1
+            for ordinal in self.holidays_for_year(year):
+                closed[ordinal - start] = 1
+            # A closed run at the end of the year points at 1 January
+            skip = [0] * days
+            distance = 0
+            for i in range(days - 1, -1, -1):
+                distance = distance + 1 if closed[i] else 0
+                skip[i] = distance
+            table = self.years[year] = (start, skip)
+        return table
+
+    def is_business_day(self, ordinal):
+        start, skip = self.year_table(datetime.date.fromordinal(ordinal).year)
+        return skip[ordinal - start] == 0
+
+    def next_business_day(self, ordinal):
+        # The given day if it is a working day, otherwise the next one
+        year = datetime.date.fromordinal(ordinal).year
+        while True:
+            start, skip = self.year_table(year)
+            ordinal += skip[ordinal - start]
+            if ordinal - start < len(skip):
+                return ordinal
+            year += 1
+
+
+business_days = BusinessCalendar(holiday_cache.for_year)
+
+
+def advance_due(due_date, frequency):
+    if frequency == 'Weekly':
+        return due_date + datetime.timedelta(weeks=1)
+    if frequency == '4 Weekly':
+        return due_date + datetime.timedelta(weeks=4)
+    if frequency == 'Monthly':
+        month = due_date.month + 1 if due_date.month < 12 else 1
+        year = due_date.year + 1 if month == 1 else due_date.year
+        try:
+            return due_date.replace(month=month, year=year)
+        except ValueError:
+            return due_date.replace(day=28, month=month, year=year)
+    return due_date
 
 # Bill categories and icons
 BILL_CATEGORIES = {
@@ -118,6 +807,136 @@ def global_exception_handler(exc_type, exc_value, exc_traceback):
 
 sys.excepthook = global_exception_handler
 
+class NotificationService:
+    # Shared by every screen. Messages wait a short window so that repeats
+    # with the same group collapse into one summary, plyer runs on a worker
+    # thread at a bounded rate, and the fallback toast reuses one popup.
+    def __init__(self, window=NOTIFY_COALESCE_SECONDS):
+        self.pending = []
+        self.groups = {}
+        self.flush_trigger = Clock.create_trigger(lambda dt: self.flush(), window)
+        self.outbox = []
+        self.outbox_ready = threading.Condition()
+        self.worker = None
+        self.toast = None
+        self.toast_label = None
+        self.toast_open = False
+        self.dismiss_trigger = Clock.create_trigger(lambda dt: self.dismiss_toast(), TOAST_SECONDS)
+
+    def notify(self, title, message, group=None):
+        # group names what repeats have in common, e.g. "rows skipped: invalid date"
+        if group is not None:
+            item = self.groups.get((title, group))
+            if item is not None:
+                item[3] += 1
+                return
+        item = [title, message, group, 1]
+        self.pending.append(item)
+        if group is not None:
+            self.groups[(title, group)] = item
+        self.flush_trigger()
+
+    def flush(self):
+        # At most NOTIFY_MAX_PER_FLUSH go out per window. The rest stay queued,
+        # still collecting repeats of their group, for the next window.
+        items = self.pending[:NOTIFY_MAX_PER_FLUSH]
+        del self.pending[:NOTIFY_MAX_PER_FLUSH]
+        for title, message, group, count in items:
+            if group is not None:
+                del self.groups[(title, group)]
+            self.send(title, message if count == 1 else f"{count} {group}")
+        if self.pending:
+            self.flush_trigger()
+
+    def send(self, title, message):
+        with self.outbox_ready:
+            self.outbox.append((title, message))
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name="notifications", daemon=True)
+                self.worker.start()
+            self.outbox_ready.notify()
+
+    def run(self):
+        while True:
+            with self.outbox_ready:
+                while not self.outbox:
+                    self.outbox_ready.wait()
+                title, message = self.outbox.pop(0)
+            try:
+                notification.notify(title=title, message=message, timeout=5)
+            except Exception as e:
+                print(f"[ERROR] Notification failed: {str(e)}")
+                Clock.schedule_once(lambda dt, message=message: self.show_toast(message))
+            time.sleep(NOTIFY_MIN_INTERVAL_SECONDS)
+
+    def show_toast(self, message):
+        try:
+            if self.toast is None:
+                self.toast_label = Label(color=(1, 1, 1, 1))
+                self.toast = Popup(
+                    title='',
+                    content=self.toast_label,
+                    size_hint=(0.8, 0.2),
+                    pos_hint={'center_x': 0.5, 'top': 0.9},
+                    auto_dismiss=True
+                )
+                self.toast.bind(on_dismiss=self.on_toast_dismiss)
+            self.toast_label.text = message
+            if not self.toast_open:
+                self.toast_open = True
+                self.toast.open()
+            self.dismiss_trigger.cancel()
+            self.dismiss_trigger()
+        except Exception as e:
+            print(f"[ERROR] Toast failed: {str(e)}")
+            log_crash(e, source="show_toast")
+
+    def dismiss_toast(self):
+        if self.toast_open:
+            self.toast.dismiss()
+
+    def on_toast_dismiss(self, popup):
+        self.toast_open = False
+        self.dismiss_trigger.cancel()
+
+notifier = NotificationService()
+
+
+def set_aside(paths):
+    # Renames unreadable store files out of the way rather than deleting them
+    stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    kept = []
+    for path in paths:
+        if os.path.exists(path):
+            os.replace(path, f"{path}.unreadable-{stamp}")
+            kept.append(f"{path}.unreadable-{stamp}")
+    return kept
+
+
+def open_storage():
+    if sqlite3 is not None:
+        try:
+            return SqliteBillStorage()
+        except sqlite3.Error as e:
+            print(f"[ERROR] SQLite storage unavailable, falling back to journal: {str(e)}")
+            log_crash(e, source="open_storage")
+    try:
+        return JournalBillStorage()
+    except Exception as e:
+        # A corrupt snapshot or journal would stop every launch, so the files
+        # are kept aside for recovery and the app starts with an empty store
+        log_crash(e, source="open_storage")
+        kept = set_aside([SNAPSHOT_FILE, JOURNAL_FILE, JOURNAL_FILE + '.compacting', STORE_FILE])
+        notifier.notify("Storage Error", f"Saved bills could not be read: {str(e)}. The files were kept as {', '.join(kept)}.")
+        return JournalBillStorage()
+
+class NotifyMixin:
+    def notify(self, title, message, group=None):
+        notifier.notify(title, message, group)
+
+    def show_toast(self, message):
+        notifier.show_toast(message)
+
 # Kivy Layout String with theme support
 KV = '''
 #:import C kivy.utils.get_color_from_hex
@@ -369,7 +1188,21 @@ ScreenManager:
                     background_normal: ''
                     background_color: C('#669933') if app.theme == 'dark' else C('#99CC66')
                     color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.backup_bills()
+                    on_release: root.open_backup_popup()
+                    canvas.before:
+                        Color:
+                            rgba: self.background_color
+                        RoundedRectangle:
+                            pos: self.pos
+                            size: self.size
+                            radius: [10]
+                Button:
+                    text: 'Export'
+                    font_size: '18sp'
+                    background_normal: ''
+                    background_color: C('#336699') if app.theme == 'dark' else C('#6699CC')
+                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
+                    on_release: root.open_export_popup()
                     canvas.before:
                         Color:
                             rgba: self.background_color
@@ -383,7 +1216,7 @@ ScreenManager:
                     background_normal: ''
                     background_color: C('#555555') if app.theme == 'dark' else C('#AAAAAA')
                     color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.import_bills()
+                    on_release: root.preview_import()
                     canvas.before:
                         Color:
                             rgba: self.background_color
@@ -417,6 +1250,32 @@ ScreenManager:
                 font_size: '24sp'
                 bold: True
                 color: C('#FFD700') if app.theme == 'dark' else C('#FF8C00')
+            Spinner:
+                id: range_spinner
+                text: 'All Time'
+                values: root.range_names
+                size_hint_y: None
+                height: 40
+                background_color: (0.2, 0.6, 0.6, 1)
+                on_text: root.select_range(self.text)
+            BoxLayout:
+                size_hint_y: None
+                height: 30
+                spacing: 10
+                Label:
+                    id: range_dates
+                    text: ""
+                    font_size: '14sp'
+                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
+                Button:
+                    id: edit_range
+                    text: "Change"
+                    size_hint_x: None
+                    width: 90
+                    opacity: 0
+                    disabled: True
+                    background_color: (0.2, 0.6, 0.6, 1)
+                    on_release: root.open_custom_range_popup()
             Label:
                 id: total_paid
                 text: f"Total Paid: {app.currency_symbol}0.00"
@@ -436,6 +1295,21 @@ ScreenManager:
                 id: chart_container
                 size_hint_y: None
                 height: 200
+            Button:
+                text: 'Analytics'
+                size_hint_y: None
+                height: 50
+                background_normal: ''
+                background_color: C('#996633') if app.theme == 'dark' else C('#CC9966')
+                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
+                on_release: root.open_analytics_popup()
+                canvas.before:
+                    Color:
+                        rgba: self.background_color
+                    RoundedRectangle:
+                        pos: self.pos
+                        size: self.size
+                        radius: [10]
             Button:
                 text: 'Back to Bills'
                 size_hint_y: None
@@ -463,7 +1337,7 @@ ScreenManager:
             size: self.size
 '''
 
-class LoginScreen(Screen):
+class LoginScreen(NotifyMixin, Screen):
     failed_attempts = 0
     lockout_until = 0
     
@@ -481,7 +1355,7 @@ class LoginScreen(Screen):
                 self.ids.pin_input.hint_text = 'Enter a 4-digit PIN'
                 return
 
-            stored_pin = store.get('pin')['value'] if store.exists('pin') else hashlib.sha256(DEFAULT_PIN.encode()).hexdigest()
+            stored_pin = storage.get_setting('pin', hashlib.sha256(DEFAULT_PIN.encode()).hexdigest())
             hashed_pin = hashlib.sha256(pin.encode()).hexdigest()
 
             if hashed_pin == stored_pin:
@@ -522,7 +1396,7 @@ class LoginScreen(Screen):
 
             def save_pin(*args):
                 try:
-                    stored_pin = store.get('pin')['value'] if store.exists('pin') else hashlib.sha256(DEFAULT_PIN.encode()).hexdigest()
+                    stored_pin = storage.get_setting('pin', hashlib.sha256(DEFAULT_PIN.encode()).hexdigest())
                     if hashlib.sha256(current_pin.text.encode()).hexdigest() != stored_pin:
                         error_label.text = "Incorrect current PIN"
                         return
@@ -532,7 +1406,7 @@ class LoginScreen(Screen):
                     if new_pin.text != confirm_pin.text:
                         error_label.text = "PINs do not match"
                         return
-                    store.put('pin', value=hashlib.sha256(new_pin.text.encode()).hexdigest())
+                    storage.put_setting('pin', hashlib.sha256(new_pin.text.encode()).hexdigest())
                     popup.dismiss()
                     self.notify("PIN Changed", "Your PIN has been updated")
                     self.manager.current = 'main'
@@ -546,185 +1420,1972 @@ class LoginScreen(Screen):
             self.notify("Error", f"Failed to open change PIN popup: {str(e)}")
             log_crash(e, source="open_change_pin_popup")
 
-    def notify(self, title, message):
+    def test_crash(self):
         try:
-            notification.notify(title=title, message=message, timeout=5)
+            dummy_dict = {}
+            print(dummy_dict['nonexistent_key'])
         except Exception as e:
-            print(f"[ERROR] Notification failed: {str(e)}")
-            self.show_toast(message)
+            self.notify("Test Crash", f"Triggered test crash: {str(e)}")
+            log_crash(e, source="test_crash")
 
-    def show_toast(self, message):
+class BillLedger:
+    # Owns the in-memory bills and keeps every registered index in step with
+    # each add, edit and delete. Indexes implement add(bill), remove(bill) and
+    # clear(); an edit is a remove of the old values followed by an add. An
+    # index may also implement add_many(bills) to take a batch in one pass.
+    def __init__(self, indexes=()):
+        self.bills = {}
+        self.indexes = list(indexes)
+        self.version = 0
+
+    def __len__(self):
+        return len(self.bills)
+
+    def __iter__(self):
+        return iter(self.bills.values())
+
+    def get(self, bill_id):
+        return self.bills.get(bill_id)
+
+    def reset(self, bills):
+        self.bills = {}
+        for index in self.indexes:
+            index.clear()
+        self.add_many(bills)
+
+    def add(self, bill):
+        self.bills[bill.id] = bill
+        for index in self.indexes:
+            index.add(bill)
+        self.version += 1
+
+    def add_many(self, bills):
+        bills = list(bills)
+        for bill in bills:
+            self.bills[bill.id] = bill
+        for index in self.indexes:
+            if hasattr(index, 'add_many'):
+                index.add_many(bills)
+            else:
+                for bill in bills:
+                    index.add(bill)
+        self.version += 1
+
+    def update(self, bill, **changes):
+        for index in self.indexes:
+            index.remove(bill)
+        for field, value in changes.items():
+            setattr(bill, field, value)
+        for index in self.indexes:
+            index.add(bill)
+        self.version += 1
+
+    def remove(self, bill):
+        if self.bills.pop(bill.id, None) is None:
+            return
+        for index in self.indexes:
+            index.remove(bill)
+        self.version += 1
+
+
+def bill_search_text(bill):
+    # Fields are joined with NUL so no trigram spans two of them
+    return '\x00'.join((
+        bill.name.lower(),
+        str(bill.amount).lower(),
+        bill.due.lower(),
+        bill.frequency.lower(),
+        bill.category.lower()
+    ))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    # Substring search over name, amount, due, frequency and category. Queries
+    # of three or more characters intersect the trigram posting sets, smallest
+    # first, then confirm each candidate; shorter queries scan the stored text.
+    # Posting sets are built on a worker thread from a copy of the texts once
+    # the ledger is loaded. Edits made meanwhile are queued and replayed when
+    # the result is installed, and searches scan the texts until then.
+    def __init__(self):
+        self.postings = None
+        self.texts = {}
+        self.changes = None
+        self.generation = 0
+
+    def clear(self):
+        self.postings = None
+        self.texts = {}
+        self.changes = None
+        self.generation += 1
+
+    def start_build(self):
+        if self.postings is not None or self.changes is not None:
+            return
+        self.changes = []
+        threading.Thread(target=self.build, args=(list(self.texts.items()), self.generation),
+                         name="search-index", daemon=True).start()
+
+    def build(self, texts, generation):
+        postings = defaultdict(set)
+        for bill_id, text in texts:
+            for gram in trigrams(text):
+                postings[gram].add(bill_id)
+        Clock.schedule_once(lambda dt: self.install(postings, generation))
+
+    def install(self, postings, generation):
+        if generation != self.generation:
+            # The ledger was reset while building; that reset started its own
+            return
+        changes, self.changes = self.changes, None
+        self.postings = postings
+        for bill_id, text, added in changes:
+            if added:
+                self.index(bill_id, text)
+            else:
+                self.unindex(bill_id, text)
+
+    def index(self, bill_id, text):
+        for gram in trigrams(text):
+            self.postings[gram].add(bill_id)
+
+    def unindex(self, bill_id, text):
+        for gram in trigrams(text):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(bill_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def add(self, bill):
+        text = self.texts[bill.id] = bill_search_text(bill)
+        if self.postings is not None:
+            self.index(bill.id, text)
+        elif self.changes is not None:
+            self.changes.append((bill.id, text, True))
+
+    def add_many(self, bills):
+        for bill in bills:
+            self.add(bill)
+        self.start_build()
+
+    def remove(self, bill):
+        text = self.texts.pop(bill.id, None)
+        if text is None:
+            return
+        if self.postings is not None:
+            self.unindex(bill.id, text)
+        elif self.changes is not None:
+            self.changes.append((bill.id, text, False))
+
+    def search(self, query, candidates=None):
+        texts = self.texts
+        if self.postings is None:
+            self.start_build()
+        if candidates is not None or len(query) < 2 or self.postings is None:
+            pool = texts if candidates is None else candidates
+            return {bill_id for bill_id in pool if query in texts[bill_id]}
+        if len(query) == 2:
+            # Every text is longer than two characters, so each occurrence lies
+            # inside one of its trigrams: the union over those is exact
+            matches = set()
+            for gram, ids in self.postings.items():
+                if query in gram:
+                    matches |= ids
+            return matches
+        if len(query) == 3:
+            # The only trigram is the query itself, so its postings are exact
+            return set(self.postings.get(query, ()))
+        # Confirming the rarest trigram's bills directly costs one substring
+        # check each, less than intersecting the other posting sets first
+        rarest = min((self.postings.get(gram, ()) for gram in trigrams(query)), key=len)
+        return {bill_id for bill_id in rarest if query in texts[bill_id]}
+
+
+class SortedBillIndex:
+    # Bill ids kept in sort-key order with bisect insert/remove, so switching
+    # sort mode or redrawing walks an existing order. Ties keep insertion order.
+    def __init__(self, key):
+        self.key = key
+        self.keys = []
+        self.ids = []
+        self.entries = {}
+        self.pending = []
+        self.sequence = 0
+
+    def clear(self):
+        self.keys = []
+        self.ids = []
+        self.entries = {}
+        self.pending = []
+
+    def add(self, bill):
+        self.merge()
+        self.sequence += 1
+        entry = self.entries[bill.id] = (self.key(bill), self.sequence)
+        i = bisect.bisect_left(self.keys, entry)
+        self.keys.insert(i, entry)
+        self.ids.insert(i, bill.id)
+
+    def add_many(self, bills):
+        # Batches wait in pending until the order is next needed, so a run of
+        # import chunks costs one merge per redraw rather than one per chunk
+        for bill in bills:
+            self.sequence += 1
+            entry = self.entries[bill.id] = (self.key(bill), self.sequence)
+            self.pending.append((entry, bill.id))
+
+    def merge(self):
+        # Pending entries are sorted on their own and spliced in with one pass
+        # of slice copies, instead of shifting both lists once per bill
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        batch.sort()
+        old_keys, old_ids = self.keys, self.ids
+        keys, ids = [], []
+        start = 0
+        for entry, bill_id in batch:
+            i = bisect.bisect_left(old_keys, entry, start)
+            keys += old_keys[start:i]
+            ids += old_ids[start:i]
+            keys.append(entry)
+            ids.append(bill_id)
+            start = i
+        keys += old_keys[start:]
+        ids += old_ids[start:]
+        self.keys, self.ids = keys, ids
+
+    def remove(self, bill):
+        entry = self.entries.pop(bill.id, None)
+        if entry is None:
+            return
+        self.merge()
+        i = bisect.bisect_left(self.keys, entry)
+        del self.keys[i]
+        del self.ids[i]
+
+    def range(self, low, high):
+        # Ids whose key lies in [low, high]
+        self.merge()
+        keys = self.keys
+        return self.ids[bisect.bisect_left(keys, (low,)):bisect.bisect_right(keys, (high, float('inf')))]
+
+    def ordered(self, matches=None):
+        self.merge()
+        if matches is None:
+            return self.ids
+        if len(matches) * 8 < len(self.ids):
+            # A narrow search is cheaper to sort on its own than to filter the full order
+            return sorted(matches, key=self.entries.__getitem__)
+        return [bill_id for bill_id in self.ids if bill_id in matches]
+
+
+def normalized_name(name):
+    return ' '.join(name.split()).casefold()
+
+
+def bill_fingerprint(name, amount_minor, due_ordinal, category):
+    # Content hash of the fields that make two bills the same bill. Names
+    # compare case- and whitespace-insensitively.
+    text = f"{normalized_name(name)}\x00{amount_minor}\x00{due_ordinal}\x00{category}"
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+class DuplicateIndex:
+    # Bill ids by content fingerprint, so adds and imports can check for an
+    # existing copy of a bill in O(1). A count per (name, due date) is kept
+    # alongside to spot rows that clash with a bill without matching it.
+    def __init__(self):
+        self.ids = {}
+        self.dated = {}
+
+    @staticmethod
+    def key(bill):
+        return bill_fingerprint(bill.name, bill.amount_minor, bill.due_ordinal, bill.category)
+
+    @staticmethod
+    def dated_key(bill):
+        return (normalized_name(bill.name), bill.due_ordinal)
+
+    def clear(self):
+        self.ids = {}
+        self.dated = {}
+
+    def add(self, bill):
+        self.ids.setdefault(self.key(bill), []).append(bill.id)
+        dated_key = self.dated_key(bill)
+        self.dated[dated_key] = self.dated.get(dated_key, 0) + 1
+
+    def remove(self, bill):
+        key = self.key(bill)
+        ids = self.ids.get(key)
+        if ids and bill.id in ids:
+            ids.remove(bill.id)
+            if not ids:
+                del self.ids[key]
+            dated_key = self.dated_key(bill)
+            if self.dated[dated_key] > 1:
+                self.dated[dated_key] -= 1
+            else:
+                del self.dated[dated_key]
+
+    def find(self, key, exclude=None):
+        for bill_id in self.ids.get(key, ()):
+            if bill_id != exclude:
+                return bill_id
+        return None
+
+    def snapshot(self):
+        # Plain fingerprint -> id copy the import worker can read and extend
+        return {key: ids[0] for key, ids in self.ids.items()}
+
+    def dated_snapshot(self):
+        return set(self.dated)
+
+
+def resolve_duplicate(existing, incoming, policy):
+    # Field changes that apply an imported duplicate to the bill already held.
+    # 'replace' takes the imported values; 'merge' keeps what is there and only
+    # fills in a paid flag or a recurrence the existing bill lacks.
+    if policy == 'replace':
+        changes = {'name': incoming.name, 'paid': incoming.paid, 'frequency': incoming.frequency}
+    else:
+        changes = {'paid': existing.paid or incoming.paid}
+        if existing.frequency == 'Custom':
+            changes['frequency'] = incoming.frequency
+    return {field: value for field, value in changes.items() if getattr(existing, field) != value}
+
+
+@lru_cache(maxsize=8192)
+def month_key(ordinal):
+    d = datetime.date.fromordinal(ordinal)
+    return (d.year, d.month)
+
+
+def month_span(key):
+    # First and last date ordinals of a (year, month) key
+    year, month = key
+    first = datetime.date(year, month, 1).toordinal()
+    following = datetime.date(year + month // 12, month % 12 + 1, 1).toordinal()
+    return first, following - 1
+
+
+class MonthGroup:
+    __slots__ = ('count', 'total_minor', 'unpaid_minor', 'unpaid_dues')
+
+    def __init__(self):
+        self.count = 0
+        self.total_minor = 0
+        self.unpaid_minor = 0
+        self.unpaid_dues = []
+
+    def overdue_count(self, today_ordinal):
+        return bisect.bisect_right(self.unpaid_dues, today_ordinal)
+
+
+class MonthGroupIndex:
+    # Totals, unpaid totals and sorted unpaid due days per (year, month), so
+    # group headers render from cached aggregates rather than re-summing bills
+    def __init__(self):
+        self.groups = {}
+
+    def clear(self):
+        self.groups = {}
+
+    def add(self, bill):
+        key = month_key(bill.due_ordinal)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = MonthGroup()
+        group.count += 1
+        group.total_minor += bill.amount_minor
+        if not bill.paid:
+            group.unpaid_minor += bill.amount_minor
+            bisect.insort(group.unpaid_dues, bill.due_ordinal)
+
+    def remove(self, bill):
+        key = month_key(bill.due_ordinal)
+        group = self.groups.get(key)
+        if group is None:
+            return
+        group.count -= 1
+        group.total_minor -= bill.amount_minor
+        if not bill.paid:
+            group.unpaid_minor -= bill.amount_minor
+            del group.unpaid_dues[bisect.bisect_left(group.unpaid_dues, bill.due_ordinal)]
+        if not group.count:
+            del self.groups[key]
+
+    def unpaid_minor(self):
+        return sum(group.unpaid_minor for group in self.groups.values())
+
+
+class SummaryTotals:
+    # Running paid, unpaid and overdue totals for the summary screen. Unpaid
+    # bills not yet due are also kept per due day, with a heap of those days,
+    # so moving them to overdue as days pass pops only the days that elapsed.
+    def __init__(self, today_ordinal=None):
+        self.today = today_ordinal or datetime.date.today().toordinal()
+        self.clear()
+
+    def clear(self):
+        self.paid_minor = 0
+        self.unpaid_minor = 0
+        self.overdue_minor = 0
+        self.upcoming = {}
+        self.upcoming_days = []
+
+    def add(self, bill):
+        if bill.paid:
+            self.paid_minor += bill.amount_minor
+            return
+        self.unpaid_minor += bill.amount_minor
+        if bill.due_ordinal <= self.today:
+            self.overdue_minor += bill.amount_minor
+        elif bill.due_ordinal in self.upcoming:
+            self.upcoming[bill.due_ordinal] += bill.amount_minor
+        else:
+            self.upcoming[bill.due_ordinal] = bill.amount_minor
+            heapq.heappush(self.upcoming_days, bill.due_ordinal)
+
+    def remove(self, bill):
+        if bill.paid:
+            self.paid_minor -= bill.amount_minor
+            return
+        self.unpaid_minor -= bill.amount_minor
+        if bill.due_ordinal <= self.today:
+            self.overdue_minor -= bill.amount_minor
+        else:
+            self.upcoming[bill.due_ordinal] -= bill.amount_minor
+
+    def rollover(self, today_ordinal):
+        # Same rule as Bill.is_overdue: unpaid and due on or before today
+        if today_ordinal <= self.today:
+            return
+        while self.upcoming_days and self.upcoming_days[0] <= today_ordinal:
+            self.overdue_minor += self.upcoming.pop(heapq.heappop(self.upcoming_days), 0)
+        self.today = today_ordinal
+
+    def totals(self, today_ordinal):
+        # (paid, unpaid, overdue) in minor units; overdue is part of unpaid
+        self.rollover(today_ordinal)
+        return self.paid_minor, self.unpaid_minor, self.overdue_minor
+
+
+class CubeCell:
+    __slots__ = ('count', 'total_minor', 'paid_count', 'paid_minor')
+
+    def __init__(self):
+        self.count = 0
+        self.total_minor = 0
+        self.paid_count = 0
+        self.paid_minor = 0
+
+    @property
+    def unpaid_minor(self):
+        return self.total_minor - self.paid_minor
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_minor += other.total_minor
+        self.paid_count += other.paid_count
+        self.paid_minor += other.paid_minor
+
+
+class AnalyticsCube:
+    # Counts and totals, split paid/unpaid, per (year, month, category). Edits
+    # touch one cell, and the analytics views roll cells up, so their cost
+    # follows the number of months and categories in use, not the bill count.
+    def __init__(self):
+        self.cells = {}
+
+    def clear(self):
+        self.cells = {}
+
+    def add(self, bill):
+        key = month_key(bill.due_ordinal) + (bill.category,)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = CubeCell()
+        cell.count += 1
+        cell.total_minor += bill.amount_minor
+        if bill.paid:
+            cell.paid_count += 1
+            cell.paid_minor += bill.amount_minor
+
+    def remove(self, bill):
+        key = month_key(bill.due_ordinal) + (bill.category,)
+        cell = self.cells.get(key)
+        if cell is None:
+            return
+        cell.count -= 1
+        cell.total_minor -= bill.amount_minor
+        if bill.paid:
+            cell.paid_count -= 1
+            cell.paid_minor -= bill.amount_minor
+        if not cell.count:
+            del self.cells[key]
+
+    def rollup(self, key, first=None, last=None):
+        # Cells summed by key((year, month, category)), limited to the
+        # (year, month) keys first..last when given
+        totals = defaultdict(CubeCell)
+        for cell_key, cell in self.cells.items():
+            if (first is None or cell_key[:2] >= first) and (last is None or cell_key[:2] <= last):
+                totals[key(cell_key)].merge(cell)
+        return totals
+
+    def category_breakdown(self, first=None, last=None):
+        # [(category, cell)], largest total first
+        totals = self.rollup(lambda k: k[2], first, last)
+        return sorted(totals.items(), key=lambda item: (-item[1].total_minor, item[0]))
+
+    def month_trend(self, first, last):
+        # [((year, month), cell)] for every month first..last, empty ones included
+        totals = self.rollup(lambda k: k[:2], first, last)
+        trend = []
+        year, month = first
+        while (year, month) <= last:
+            trend.append(((year, month), totals.get((year, month)) or CubeCell()))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return trend
+
+    def top_categories(self, count=ANALYTICS_TOP_CATEGORIES, first=None, last=None):
+        return self.category_breakdown(first, last)[:count]
+
+
+class FenwickTree:
+    # Binary indexed tree over positions 1..size. Nodes are kept in a dict,
+    # since only those on the update paths of used positions are ever non-zero.
+    def __init__(self, size):
+        self.size = size
+        self.nodes = {}
+
+    def add(self, position, delta):
+        nodes = self.nodes
+        while position <= self.size:
+            nodes[position] = nodes.get(position, 0) + delta
+            position += position & -position
+
+    def prefix(self, position):
+        # Sum of positions 1..position
+        nodes = self.nodes
+        position = min(position, self.size)
+        total = 0
+        while position > 0:
+            total += nodes.get(position, 0)
+            position &= position - 1
+        return total
+
+    def range(self, low, high):
+        if high < low:
+            return 0
+        return self.prefix(high) - self.prefix(low - 1)
+
+
+class DueRangeTotals:
+    # Paid and unpaid amounts by due day in Fenwick trees, so the totals for
+    # any date range are a few prefix sums rather than a scan of the bills
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.paid = FenwickTree(datetime.date.max.toordinal())
+        self.unpaid = FenwickTree(datetime.date.max.toordinal())
+
+    def add(self, bill):
+        (self.paid if bill.paid else self.unpaid).add(bill.due_ordinal, bill.amount_minor)
+
+    def add_many(self, bills):
+        # Summed per day first, so a reload walks each used day's path once
+        days = defaultdict(int)
+        for bill in bills:
+            days[(bill.paid, bill.due_ordinal)] += bill.amount_minor
+        for (paid, day), amount in days.items():
+            (self.paid if paid else self.unpaid).add(day, amount)
+
+    def remove(self, bill):
+        (self.paid if bill.paid else self.unpaid).add(bill.due_ordinal, -bill.amount_minor)
+
+    def totals(self, low, high, today_ordinal):
+        # (paid, unpaid, overdue) for bills due low..high, in minor units
+        return (self.paid.range(low, high), self.unpaid.range(low, high),
+                self.unpaid.range(low, min(high, today_ordinal)))
+
+
+def summary_range(name, today):
+    # First and last day ordinals of a named summary range; None is all time
+    if name == 'This Week':
+        monday = today - datetime.timedelta(days=today.weekday())
+        return monday.toordinal(), monday.toordinal() + 6
+    if name == 'This Pay Period':
+        # From one pay day up to the day before the next
+        start = today.replace(day=PAY_DAY) if today.day >= PAY_DAY else \
+            (today.replace(day=1) - datetime.timedelta(days=1)).replace(day=PAY_DAY)
+        following = (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=PAY_DAY)
+        return start.toordinal(), following.toordinal() - 1
+    if name == 'This Quarter':
+        first_month = (today.month - 1) // 3 * 3 + 1
+        return month_span((today.year, first_month))[0], month_span((today.year, first_month + 2))[1]
+    return None
+
+
+def recurring_series(bills):
+    # The latest bill of each recurring series. mark_bill_paid copies a bill
+    # forward with the same name, category and frequency, so those identify it.
+    latest = {}
+    for bill in bills:
+        if bill.frequency in FORECAST_FREQUENCIES:
+            key = (normalized_name(bill.name), bill.category, bill.frequency)
+            if key not in latest or bill.due_ordinal > latest[key].due_ordinal:
+                latest[key] = bill
+    return list(latest.values())
+
+
+def month_index(ordinal):
+    d = datetime.date.fromordinal(ordinal)
+    return d.year * 12 + d.month - 1
+
+
+class CashFlowForecast:
+    # Projects recurring bills over the months from today's to `months` ahead.
+    # Each series repeats from its latest bill: weekly ones every 7 or 28 days,
+    # monthly ones on the same day of the month (the 28th where that day does
+    # not exist, as advance_due does), each date rolled forward to a working
+    # day. The latest bill counts too while it is unpaid. With NumPy every
+    # occurrence of every series is generated and summed in bulk; without it
+    # the same schedule is walked one occurrence at a time.
+    def __init__(self, calendar, today_ordinal, months):
+        self.calendar = calendar
+        self.start = today_ordinal
+        self.first_month = month_index(today_ordinal)
+        self.last_month = self.first_month + months - 1
+        self.end = month_span((self.last_month // 12, self.last_month % 12 + 1))[1]
+
+    def project(self, bills, vectorized=None):
+        # {'count', 'total', 'days': [(ordinal, minor)], 'months': [((year, month), minor)],
+        #  'categories': [(category, minor)]}; months covers the whole horizon
+        series = recurring_series(bills)
+        if vectorized is None:
+            vectorized = numpy is not None
+        if vectorized:
+            return self.project_numpy(series)
+        return self.project_python(series)
+
+    def python_occurrences(self, bill):
+        k = 0 if not bill.paid else 1
+        if bill.frequency == 'Monthly':
+            seed = datetime.date.fromordinal(bill.due_ordinal)
+            base = seed.year * 12 + seed.month - 1
+            k = max(k, self.first_month - 1 - base)
+            while base + k <= self.last_month:
+                year, month = divmod(base + k, 12)
+                try:
+                    nominal = datetime.date(year, month + 1, seed.day).toordinal()
+                except ValueError:
+                    nominal = datetime.date(year, month + 1, 28).toordinal()
+                yield self.calendar.next_business_day(nominal)
+                k += 1
+        else:
+            step = FORECAST_STEP_DAYS[bill.frequency]
+            k = max(k, -(-(self.start - FORECAST_ROLL_MARGIN_DAYS - bill.due_ordinal) // step))
+            while bill.due_ordinal + k * step <= self.end:
+                yield self.calendar.next_business_day(bill.due_ordinal + k * step)
+                k += 1
+
+    def project_python(self, series):
+        days = defaultdict(int)
+        months = defaultdict(int)
+        categories = defaultdict(int)
+        count = 0
+        for bill in series:
+            for ordinal in self.python_occurrences(bill):
+                if self.start <= ordinal <= self.end:
+                    days[ordinal] += bill.amount_minor
+                    months[month_index(ordinal)] += bill.amount_minor
+                    categories[bill.category] += bill.amount_minor
+                    count += 1
+        return self.result(count, sorted(days.items()), months, categories)
+
+    def project_numpy(self, series):
+        monthly = [b for b in series if b.frequency == 'Monthly']
+        stepped = [b for b in series if b.frequency != 'Monthly']
+        parts = [self.numpy_stepped(stepped), self.numpy_monthly(monthly)]
+        ordinals = numpy.concatenate([p[0] for p in parts])
+        amounts = numpy.concatenate([p[1] for p in parts])
+        categories = [b.category for b in stepped] + [b.category for b in monthly]
+        owners = numpy.concatenate([parts[0][2], parts[1][2] + len(stepped)])
+        ordinals = self.numpy_roll(ordinals)
+        keep = (ordinals >= self.start) & (ordinals <= self.end)
+        ordinals, amounts, owners = ordinals[keep], amounts[keep], owners[keep]
+
+        offsets = ordinals - self.start
+        by_day = numpy.bincount(offsets, weights=amounts, minlength=self.end - self.start + 1)
+        used = numpy.flatnonzero(by_day)
+        days = list(zip((used + self.start).tolist(), numpy.rint(by_day[used]).astype(numpy.int64).tolist()))
+        # Months since year 0 from the ordinals, via NumPy's 1970-based datetimes
+        epoch = datetime.date(1970, 1, 1).toordinal()
+        month_ids = (ordinals - epoch).astype('datetime64[D]').astype('datetime64[M]').astype(numpy.int64) + 1970 * 12
+        by_month = numpy.bincount(month_ids - self.first_month, weights=amounts,
+                                  minlength=self.last_month - self.first_month + 1)
+        months = {self.first_month + i: int(round(v)) for i, v in enumerate(by_month.tolist()) if v}
+        by_owner = numpy.bincount(owners, weights=amounts, minlength=len(categories))
+        totals = defaultdict(int)
+        for category, value in zip(categories, by_owner.tolist()):
+            if value:
+                totals[category] += int(round(value))
+        return self.result(len(ordinals), days, months, totals)
+
+    def numpy_expand(self, first, last):
+        # (series index, k) for every k in first[i]..last[i] of every series i
+        counts = numpy.maximum(last - first + 1, 0)
+        owners = numpy.repeat(numpy.arange(len(counts)), counts)
+        starts = numpy.cumsum(counts) - counts
+        ks = numpy.arange(counts.sum()) - numpy.repeat(starts, counts) + first[owners]
+        return owners, ks
+
+    def numpy_stepped(self, bills):
+        seeds = numpy.array([b.due_ordinal for b in bills], dtype=numpy.int64)
+        steps = numpy.array([FORECAST_STEP_DAYS[b.frequency] for b in bills], dtype=numpy.int64)
+        amounts = numpy.array([b.amount_minor for b in bills], dtype=numpy.int64)
+        first = numpy.array([0 if not b.paid else 1 for b in bills], dtype=numpy.int64)
+        first = numpy.maximum(first, -((seeds - (self.start - FORECAST_ROLL_MARGIN_DAYS)) // steps))
+        owners, ks = self.numpy_expand(first, (self.end - seeds) // steps)
+        return seeds[owners] + ks * steps[owners], amounts[owners], owners
+
+    def numpy_monthly(self, bills):
+        seeds = [datetime.date.fromordinal(b.due_ordinal) for b in bills]
+        bases = numpy.array([d.year * 12 + d.month - 1 for d in seeds], dtype=numpy.int64)
+        seed_days = numpy.array([d.day for d in seeds], dtype=numpy.int64)
+        amounts = numpy.array([b.amount_minor for b in bills], dtype=numpy.int64)
+        first = numpy.array([0 if not b.paid else 1 for b in bills], dtype=numpy.int64)
+        first = numpy.maximum(first, self.first_month - 1 - bases)
+        owners, ks = self.numpy_expand(first, self.last_month - bases)
+        months = bases[owners] + ks
+        # First day of each month and of the one after, as date ordinals
+        epoch = datetime.date(1970, 1, 1).toordinal()
+        month_starts = (months - 1970 * 12).astype('datetime64[M]').astype('datetime64[D]').astype(numpy.int64) + epoch
+        next_starts = (months + 1 - 1970 * 12).astype('datetime64[M]').astype('datetime64[D]').astype(numpy.int64) + epoch
+        days = seed_days[owners]
+        days = numpy.where(days <= next_starts - month_starts, days, 28)
+        return month_starts + days - 1, amounts[owners], owners
+
+    def numpy_roll(self, ordinals):
+        # BusinessCalendar skip tables for the years spanned, laid end to end.
+        # A closed run at the end of a year skips to 1 January, which may be
+        # closed itself, hence the second lookup.
+        if not len(ordinals):
+            return ordinals
+        first_year = datetime.date.fromordinal(int(ordinals.min())).year
+        last_year = datetime.date.fromordinal(int(ordinals.max())).year + 1
+        base = self.calendar.year_table(first_year)[0]
+        skip = numpy.concatenate([numpy.array(self.calendar.year_table(year)[1], dtype=numpy.int64)
+                                  for year in range(first_year, last_year + 1)])
+        ordinals = ordinals + skip[ordinals - base]
+        return ordinals + skip[ordinals - base]
+
+    def result(self, count, days, months, categories):
+        return {
+            'count': count,
+            'total': sum(amount for _, amount in days),
+            'days': days,
+            'months': [((i // 12, i % 12 + 1), months.get(i, 0)) for i in range(self.first_month, self.last_month + 1)],
+            'categories': sorted(categories.items(), key=lambda item: (-item[1], item[0]))
+        }
+
+
+def reminder_time(bill):
+    # Midnight at the start of the day before the bill is due
+    return datetime.datetime.combine(bill.due_date, datetime.time()).timestamp() - REMINDER_LEAD_SECONDS
+
+
+class ReminderScheduler:
+    # Min-heap of [fire_time, bill_id, kind, live] entries with one Clock event
+    # armed for the earliest. Registered on the ledger, so a single bill change
+    # is a heap push plus marking the old entry dead rather than a full rebuild.
+    def __init__(self, on_fire):
+        self.on_fire = on_fire
+        self.heap = []
+        self.entries = {}
+        self.event = None
+        self.armed_for = None
+        # (bill_id, kind, fire_time) of reminders delivered by fire() or a
+        # catch-up digest, so a reload of the ledger does not queue them again.
+        # A new bill, or one moved to another day, has a new key and still fires.
+        self.delivered = set()
+        self.arm_trigger = Clock.create_trigger(lambda dt: self.arm())
+
+    def discard_until(self, until):
+        # Drops entries already covered by a catch-up digest
+        self.forget_delivered(until)
+        heap = self.heap
+        while heap and heap[0][0] <= until:
+            fire_time, bill_id, kind, live = heapq.heappop(heap)
+            if live:
+                del self.entries[(bill_id, kind)]
+                self.delivered.add((bill_id, kind, fire_time))
+        self.arm_trigger()
+
+    def forget_delivered(self, now):
+        # add() turns these bills away once they are due anyway
+        self.delivered = {key for key in self.delivered if key[2] + REMINDER_LEAD_SECONDS > now}
+
+    def clear(self):
+        self.heap = []
+        self.entries = {}
+        self.arm_trigger()
+
+    def add(self, bill, kind='due_soon'):
+        if bill.paid:
+            return
+        fire_time = reminder_time(bill)
+        if fire_time + REMINDER_LEAD_SECONDS <= time.time() or (bill.id, kind, fire_time) in self.delivered:
+            return
+        entry = [fire_time, bill.id, kind, True]
+        self.entries[(bill.id, kind)] = entry
+        heapq.heappush(self.heap, entry)
+        if entry is self.heap[0]:
+            self.arm_trigger()
+
+    def remove(self, bill, kind='due_soon'):
+        entry = self.entries.pop((bill.id, kind), None)
+        if entry is not None:
+            entry[3] = False
+            if entry is self.heap[0]:
+                self.arm_trigger()
+            elif len(self.heap) > 2 * len(self.entries) + 64:
+                # Drop dead entries once they outnumber the live ones
+                self.heap = [e for e in self.heap if e[3]]
+                heapq.heapify(self.heap)
+
+    def arm(self):
+        heap = self.heap
+        while heap and not heap[0][3]:
+            heapq.heappop(heap)
+        fire_time = heap[0][0] if heap else None
+        if fire_time == self.armed_for:
+            return
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+        self.armed_for = fire_time
+        if fire_time is not None:
+            self.event = Clock.schedule_once(self.fire, max(fire_time - time.time(), 0))
+
+    def fire(self, dt):
+        # Everything due by now goes to on_fire in one batch, so a bulk import
+        # of bills due tomorrow is one reminder rather than one per bill
+        self.event = None
+        self.armed_for = None
+        now = time.time()
+        self.forget_delivered(now)
+        heap = self.heap
+        due = []
+        while heap and heap[0][0] <= now:
+            fire_time, bill_id, kind, live = heapq.heappop(heap)
+            if live:
+                del self.entries[(bill_id, kind)]
+                self.delivered.add((bill_id, kind, fire_time))
+                due.append((bill_id, kind))
+        if due:
+            self.on_fire(due)
+        self.arm()
+
+
+class SearchPipeline:
+    # Debounces the search box: each keystroke restarts the timer, so only the
+    # last query typed inside the window refreshes the list. A query that
+    # extends the previous one is filtered from the previous matches.
+    def __init__(self, callback, index, delay=SEARCH_DEBOUNCE_SECONDS):
+        self.index = index
+        self.query = ''
+        self.matches = None
+        self.trigger = Clock.create_trigger(lambda dt: callback(), delay)
+
+    def submit(self):
+        self.trigger.cancel()
+        self.trigger()
+
+    def cancel(self):
+        self.trigger.cancel()
+
+    def filter(self, query, refine=False):
+        # Returns the matching bill ids, or None when every bill matches. Only
+        # refine when nothing but the query changed since the last pass.
+        if not query:
+            self.matches = None
+        elif refine and self.matches is not None and self.query in query:
+            self.matches = self.index.search(query, self.matches)
+        else:
+            self.matches = self.index.search(query)
+        self.query = query
+        return self.matches
+
+
+class BillListViewModel:
+    # Row model behind the bills RecycleView. Month header rows are cached per
+    # key and reused while their content is unchanged. Bill rows are cached per
+    # bill id and the model is registered on the ledger, so a bill is formatted
+    # again only after it is edited or the day or currency changes. Each
+    # refresh then only pushes the span of rows that actually differs.
+    def __init__(self, format_bill):
+        self.format_bill = format_bill
+        self.rows = []
+        self.cache = {}
+        self.used = {}
+        self.bill_rows = {}
+        self.context = None
+
+    def row(self, key, signature, build):
+        cached = self.cache.get(key)
+        if cached is None or cached[0] != signature:
+            cached = (signature, build())
+        self.used[key] = cached
+        return cached[1]
+
+    def set_context(self, *context):
+        # Everything a bill row shows besides the bill itself
+        if context != self.context:
+            self.context = context
+            self.bill_rows = {}
+
+    def bill_row(self, bill):
+        row = self.bill_rows.get(bill.id)
+        if row is None:
+            row = self.bill_rows[bill.id] = self.format_bill(bill, *self.context)
+        return row
+
+    def add(self, bill):
+        pass
+
+    def add_many(self, bills):
+        pass
+
+    def remove(self, bill):
+        self.bill_rows.pop(bill.id, None)
+
+    def clear(self):
+        self.bill_rows = {}
+
+    def reset(self):
+        self.rows = []
+        self.cache = {}
+        self.used = {}
+        self.bill_rows = {}
+
+    def apply(self, rv, rows):
+        # Returns the number of rows inserted, removed or replaced in rv.data
+        self.cache, self.used = self.used, {}
+        data = rv.data
+        old = self.rows
+        self.rows = list(rows)
+        if len(data) != len(old):
+            rv.data = list(rows)
+            return len(rows)
+
+        start, limit = 0, min(len(old), len(rows))
+        while start < limit and old[start] is rows[start]:
+            start += 1
+        end_old, end_new = len(old), len(rows)
+        while end_old > start and end_new > start and old[end_old - 1] is rows[end_new - 1]:
+            end_old -= 1
+            end_new -= 1
+
+        # Same-length spans go through as a 'modified' slice and the remainder
+        # as one removal or one insertion, so each is a single data dispatch.
+        # Rows added at the end are appended, which keeps every untouched row
+        # in the layout.
+        common = min(end_old, end_new) - start
+        split = start + common
+        if common:
+            data[start:split] = rows[start:split]
+        if end_old > split:
+            del data[split:end_old]
+        elif end_new > split:
+            if split == len(data):
+                data.extend(rows[split:end_new])
+            elif end_new - split == 1:
+                data.insert(split, rows[split])
+            else:
+                # RecycleDataModel misreads an empty-slice assignment, so the
+                # run goes in together with the unchanged row that follows it
+                data[split:split + 1] = rows[split:end_new + 1]
+        return max(end_old, end_new) - start
+
+
+IMPORT_FIELDS = ('Name', 'Amount', 'Paid', 'Due', 'Category')
+
+
+class BillRowValidator:
+    # Built once per file from its header row, so each data row is checked by
+    # position instead of through a dict. Calling it returns a Bill or raises
+    # ValueError with the reason the row was skipped.
+    def __init__(self, header):
+        header = [h.strip() for h in header]
+        missing = [f for f in IMPORT_FIELDS if f not in header]
+        if missing:
+            raise ValueError(f"missing columns {', '.join(missing)}")
+        self.name, self.amount, self.paid, self.due, self.category = (header.index(f) for f in IMPORT_FIELDS)
+        self.frequency = header.index('Frequency') if 'Frequency' in header else None
+        self.width = max(self.name, self.amount, self.paid, self.due, self.category) + 1
+        self.categories = frozenset(BILL_CATEGORIES)
+
+    def row_name(self, row):
+        return row[self.name] if len(row) > self.name else 'Unknown'
+
+    def __call__(self, row):
+        return Bill(new_bill_id(), *self.fields(row))
+
+    def fields(self, row):
+        # Validated (name, amount_minor, paid, due_ordinal, category, frequency)
+        if len(row) < self.width:
+            raise ValueError("missing fields")
+        due = row[self.due]
+        if not DUE_DATE_PATTERN.match(due):
+            raise ValueError("invalid date")
         try:
-            toast = Popup(
-                title='',
-                content=Label(text=message, color=(1, 1, 1, 1)),
-                size_hint=(0.8, 0.2),
-                pos_hint={'center_x': 0.5, 'top': 0.9},
-                auto_dismiss=True
-            )
-            toast.open()
-            Clock.schedule_once(lambda dt: toast.dismiss(), 2)
+            ordinal = due_ordinal(due)
+        except ValueError:
+            raise ValueError("invalid date")
+        try:
+            amount = float(row[self.amount])
+            if amount <= 0:
+                raise ValueError
+            amount_minor = round(amount * 100)
+        except (ValueError, OverflowError):
+            raise ValueError("invalid amount")
+        category = row[self.category]
+        frequency = row[self.frequency] if self.frequency is not None and len(row) > self.frequency else ''
+        return (
+            row[self.name],
+            amount_minor,
+            row[self.paid].lower() == 'true',
+            ordinal,
+            category if category in self.categories else 'Other',
+            frequency or 'Custom'
+        )
+
+
+def read_import_rows(path, on_bytes=None, offset=0):
+    # Raw rows of an import file, header first unless offset skips past it.
+    # CSV goes through the csv module; TXT is split on commas line by line as
+    # it always was.
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        def lines():
+            for raw in f:
+                if on_bytes is not None:
+                    on_bytes(len(raw))
+                yield raw.decode('utf-8')
+
+        if path.endswith('.csv'):
+            yield from csv.reader(lines())
+        else:
+            for line in lines():
+                if line.strip():
+                    yield line.strip().split(',')
+
+
+def parse_import_chunk(path, header, offset, max_rows):
+    # Pool half of a multi-file import: validates up to max_rows rows from a
+    # byte offset and returns plain tuples, which are cheap to send back from
+    # another process, with the offset the next chunk starts at. The first
+    # chunk passes header=None and reads it; None means it is not an import
+    # header. Rows are only cut between whole records, so a quoted CSV field
+    # spanning lines is never split.
+    read = [offset]
+
+    def count_bytes(count):
+        read[0] += count
+
+    rows = read_import_rows(path, count_bytes, offset)
+    try:
+        if header is None:
+            header = next(rows, None) or []
+        validate = BillRowValidator(header)
+    except ValueError:
+        rows.close()
+        return None
+    bills, rejects = [], []
+    done = True
+    for row in rows:
+        if not row:
+            continue
+        try:
+            bills.append(validate.fields(row))
+        except ValueError as e:
+            rejects.append((validate.row_name(row), str(e)))
+        if len(bills) + len(rejects) >= max_rows:
+            done = False
+            break
+    rows.close()
+    return header, bills, rejects, read[0], done
+
+
+def import_pool(files):
+    # Parsing is pure Python and holds the GIL, so only separate processes run
+    # it any faster, and only with several files and cores to pay for starting
+    # them. Forked processes are used on desktop Linux alone: forking a
+    # threaded SDL process is unsafe on macOS, spawned workers would re-import
+    # this module and open a window each, and Android cannot run worker
+    # processes at all. None means stream the files one at a time instead.
+    workers = min(os.cpu_count() or 1, files)
+    if files < IMPORT_PARALLEL_MIN_FILES or workers < 2:
+        return None
+    if platform != 'linux' or 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    try:
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')), workers
+    except (OSError, NotImplementedError, ImportError) as e:
+        print(f"[ERROR] Process pool unavailable, importing files one at a time: {str(e)}")
+        return None
+
+
+class PooledImportFile:
+    # One file of a pooled import: the chunk being parsed and the parsed chunks
+    # waiting to be merged. At most IMPORT_PARALLEL_AHEAD chunks are held, so a
+    # file being read ahead costs a few chunks of rows rather than the file.
+    __slots__ = ('pool', 'path', 'chunk_rows', 'future', 'chunks', 'merged')
+
+    def __init__(self, pool, path, chunk_rows):
+        self.pool = pool
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.future = pool.submit(parse_import_chunk, path, None, 0, chunk_rows)
+        self.chunks = deque()
+        self.merged = 0
+
+    @property
+    def finished(self):
+        return self.future is None and not self.chunks
+
+    def collect(self):
+        # Queues a finished chunk and starts parsing the one after it
+        future = self.future
+        if future is None or not future.done() or len(self.chunks) >= IMPORT_PARALLEL_AHEAD:
+            return
+        try:
+            chunk = future.result()
         except Exception as e:
-            print(f"[ERROR] Toast failed: {str(e)}")
-            log_crash(e, source="show_toast")
+            chunk = e
+        self.future = None
+        self.chunks.append(chunk)
+        if isinstance(chunk, tuple) and not chunk[4]:
+            header, bills, rejects, offset, done = chunk
+            self.future = self.pool.submit(parse_import_chunk, self.path, header, offset, self.chunk_rows)
+
+
+class WorkerTask(ABC):
+    # Background job on a daemon thread. Results go back to the UI thread via
+    # post(), and cancel() asks run() to stop at its next check.
+    name = "worker"
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def post(self, callback, *args):
+        Clock.schedule_once(lambda dt: callback(*args))
+
+    @abstractmethod
+    def run(self):
+        pass
+
+
+class BillImporter(WorkerTask):
+    # Reads import files on a worker thread, a chunk of rows at a time. Each
+    # chunk is validated and checked against a fingerprint snapshot of the
+    # ledger; new bills are committed to storage, and both they and any
+    # duplicates to merge or replace are handed to the UI thread with the
+    # progress, so only one chunk of parsed rows is held at once.
+    name = "bill-import"
+
+    def __init__(self, paths, known, policy, on_chunk, on_notify, on_done, chunk_rows=IMPORT_CHUNK_ROWS):
+        super().__init__()
+        self.paths = paths
+        self.known = known
+        self.policy = policy
+        self.on_chunk = on_chunk
+        self.on_notify = on_notify
+        self.on_done = on_done
+        self.chunk_rows = chunk_rows
+        self.stats = {'added': 0, 'merged': 0, 'replaced': 0, 'skipped': 0, 'invalid': 0}
+        # Invalid rows per reason as [count, first row's name], reported with
+        # the result rather than by one UI callback per row
+        self.rejects = {}
+        self.added, self.matched = [], []
+        self.read_bytes = 0
+        self.total_bytes = 1
+        # Bounds how many committed chunks can wait on the UI thread
+        self.in_flight = threading.Semaphore(2)
+
+    @property
+    def progress(self):
+        return min(self.read_bytes / self.total_bytes, 1.0)
+
+    def run(self):
+        imported_files = 0
+        try:
+            self.total_bytes = sum(os.path.getsize(p) for p in self.paths) or 1
+            pool = import_pool(len(self.paths))
+            if pool is not None:
+                imported_files = self.import_parallel(*pool)
+                return
+            done_bytes = 0
+            for path in self.paths:
+                if self.cancelled.is_set():
+                    break
+                try:
+                    if self.import_file(path):
+                        imported_files += 1
+                except Exception as e:
+                    self.post(self.on_notify, "Import Failed", f"Error reading {path}: {str(e)}", None)
+                    log_crash(e, source="import_bills_read")
+                done_bytes += os.path.getsize(path)
+                self.read_bytes = done_bytes
+        finally:
+            self.finish(imported_files)
 
-    def test_crash(self):
+    def finish(self, imported_files):
+        self.post(self.on_done, imported_files, self.stats, self.rejects)
+
+    def count_bytes(self, count):
+        self.read_bytes += count
+
+    def import_file(self, path):
+        rows = read_import_rows(path, self.count_bytes)
         try:
-            dummy_dict = {}
-            print(dummy_dict['nonexistent_key'])
+            validate = BillRowValidator(next(rows, None) or [])
+        except ValueError:
+            rows.close()
+            self.post(self.on_notify, "Import Warning", f"Invalid headers in {path}", None)
+            return False
+        for row in rows:
+            if self.cancelled.is_set():
+                rows.close()
+                break
+            if not row:
+                continue
+            try:
+                bill = validate(row)
+            except ValueError as e:
+                self.reject(validate.row_name(row), str(e))
+                continue
+            self.accept(bill)
+        self.flush()
+        return True
+
+    def import_parallel(self, pool, workers):
+        # Files are parsed concurrently in chunks of rows, a bounded window of
+        # files ahead, but merged strictly in path order, so cross-file
+        # duplicate checks give the same result whichever file finishes first
+        imported_files = 0
+        paths = iter(self.paths)
+        window = deque()
+
+        def open_next():
+            path = next(paths, None)
+            if path is not None:
+                window.append(PooledImportFile(pool, path, self.chunk_rows))
+
+        try:
+            for _ in range(workers):
+                open_next()
+            while window and not self.cancelled.is_set():
+                for parsing in window:
+                    parsing.collect()
+                head = window[0]
+                if not head.chunks:
+                    parsing = [p.future for p in window if p.future is not None and len(p.chunks) < IMPORT_PARALLEL_AHEAD]
+                    wait(parsing, timeout=0.5, return_when=FIRST_COMPLETED)
+                    continue
+                chunk = head.chunks.popleft()
+                if isinstance(chunk, Exception):
+                    self.post(self.on_notify, "Import Failed", f"Error reading {head.path}: {str(chunk)}", None)
+                    log_crash(chunk, source="import_bills_read")
+                    offset = os.path.getsize(head.path)
+                elif chunk is None:
+                    self.post(self.on_notify, "Import Warning", f"Invalid headers in {head.path}", None)
+                    offset = os.path.getsize(head.path)
+                else:
+                    header, bills, rejects, offset, done = chunk
+                    for name, reason in rejects:
+                        self.reject(name, reason)
+                    for fields in bills:
+                        self.accept(Bill(new_bill_id(), *fields))
+                    if done:
+                        imported_files += 1
+                self.read_bytes += offset - head.merged
+                head.merged = offset
+                if head.finished:
+                    window.popleft()
+                    open_next()
+                    self.flush()
+            self.flush()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return imported_files
+
+    def reject(self, name, reason):
+        self.stats['invalid'] += 1
+        entry = self.rejects.get(reason)
+        if entry is None:
+            self.rejects[reason] = [1, name]
+        else:
+            entry[0] += 1
+
+    def accept(self, bill):
+        key = DuplicateIndex.key(bill)
+        existing = self.known.get(key)
+        if existing is None:
+            self.known[key] = bill.id
+            self.added.append(bill)
+        elif self.policy == 'skip':
+            self.stats['skipped'] += 1
+        else:
+            self.matched.append((existing, bill))
+        if len(self.added) + len(self.matched) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        added, matched = self.added, self.matched
+        if not (added or matched):
+            return
+        self.added, self.matched = [], []
+        if added:
+            storage.put_bills([b.to_dict() for b in added])
+            self.stats['added'] += len(added)
+        # A cancelled import stops waiting for a slot, but the chunk is already
+        # stored so it is still delivered, just without holding one
+        acquired = self.in_flight.acquire(timeout=0.5)
+        while not acquired and not self.cancelled.is_set():
+            acquired = self.in_flight.acquire(timeout=0.5)
+        self.post(self.deliver, added, matched, self.progress, acquired)
+
+    def deliver(self, added, matched, progress, acquired):
+        try:
+            self.on_chunk(self, added, matched, progress)
+        finally:
+            if acquired:
+                self.in_flight.release()
+
+
+class ImportPreview(BillImporter):
+    # Dry run of an import. Rows are read and validated exactly as for a real
+    # import, then sorted into new, duplicate, conflicting (same name and due
+    # date as a bill, different amount or category) and invalid using the
+    # ledger's index snapshots. Nothing is stored; the counts and a capped
+    # sample of each kind go back to the UI thread.
+    KINDS = ('new', 'duplicate', 'conflict', 'invalid')
+
+    def __init__(self, paths, known, dated, on_notify, on_done):
+        super().__init__(paths, known, 'skip', None, on_notify, on_done)
+        self.dated = dated
+        self.counts = dict.fromkeys(self.KINDS, 0)
+        self.samples = {kind: [] for kind in self.KINDS}
+
+    def finish(self, imported_files):
+        self.post(self.on_done, imported_files, self)
+
+    def reject(self, name, reason):
+        self.counts['invalid'] += 1
+        if len(self.samples['invalid']) < IMPORT_PREVIEW_SAMPLE_ROWS:
+            self.samples['invalid'].append(f"{name}: {reason}")
+
+    def accept(self, bill):
+        key = DuplicateIndex.key(bill)
+        if key in self.known:
+            kind = 'duplicate'
+        else:
+            dated_key = DuplicateIndex.dated_key(bill)
+            kind = 'conflict' if dated_key in self.dated else 'new'
+            self.known[key] = bill.id
+            self.dated.add(dated_key)
+        self.counts[kind] += 1
+        # Only sampled rows are formatted
+        if len(self.samples[kind]) < IMPORT_PREVIEW_SAMPLE_ROWS:
+            self.samples[kind].append(f"{bill.name}: {bill.amount:.2f} due {bill.due}")
+
+    def flush(self):
+        pass
+
+    def rows(self):
+        return [(kind, text) for kind in self.KINDS for text in self.samples[kind]]
+
+
+class BillExporter(WorkerTask):
+    # Writes the stored bills on a worker thread, paging them out of storage
+    # rather than materialising the list. Output can be CSV, gzip CSV or JSONL,
+    # optionally one file per due year. Every file is written to a .tmp name
+    # and only renamed into place once the whole export has succeeded, so a
+    # cancelled or failed run leaves the previous export as it was.
+    name = "bill-export"
+
+    def __init__(self, directory, fmt, by_year, on_progress, on_done):
+        super().__init__()
+        self.directory = directory
+        self.fmt = fmt
+        self.by_year = by_year
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.outputs = {}
+
+    def output(self, year):
+        suffix = f"_{year}" if self.by_year and year is not None else ""
+        out = self.outputs.get(suffix)
+        if out is None:
+            path = os.path.join(self.directory, f"{EXPORT_FILE_PREFIX}{suffix}{EXPORT_FORMATS[self.fmt]}")
+            if self.fmt == 'CSV (gzip)':
+                f = gzip.open(path + '.tmp', 'wt', newline='', encoding='utf-8')
+            else:
+                f = open(path + '.tmp', 'w', newline='', encoding='utf-8')
+            writer = None
+            if self.fmt != 'JSONL':
+                writer = csv.writer(f)
+                writer.writerow(EXPORT_COLUMNS)
+            out = self.outputs[suffix] = (path, f, writer, [])
+        return out
+
+    def write_pending(self):
+        for path, f, writer, pending in self.outputs.values():
+            if not pending:
+                continue
+            if writer is not None:
+                writer.writerows(pending)
+            else:
+                f.write(''.join(pending))
+            pending.clear()
+
+    def run(self):
+        paths = []
+        exported = 0
+        error = None
+        try:
+            total = storage.count_bills()
+            csv_rows = self.fmt != 'JSONL'
+            for data in storage.iter_bills():
+                if self.cancelled.is_set():
+                    break
+                try:
+                    b = Bill.from_dict(data)
+                except ValueError:
+                    # Same bills the list shows: load_bills discards these too
+                    continue
+                _, _, _, pending = self.output(month_key(b.due_ordinal)[0])
+                if csv_rows:
+                    pending.append([b.name, b.amount, b.paid, b.due, b.category, b.frequency])
+                else:
+                    pending.append(json.dumps(b.to_dict()) + '\n')
+                exported += 1
+                if exported % EXPORT_BATCH_ROWS == 0:
+                    self.write_pending()
+                    self.post(self.on_progress, exported, total)
+            if not self.outputs and not self.cancelled.is_set():
+                self.output(None)
+            self.write_pending()
         except Exception as e:
-            self.notify("Test Crash", f"Triggered test crash: {str(e)}")
-            log_crash(e, source="test_crash")
+            error = e
+            log_crash(e, source="export_bills_write")
+        finally:
+            for path, f, writer, pending in self.outputs.values():
+                f.close()
+            done = error is None and not self.cancelled.is_set()
+            for path, f, writer, pending in self.outputs.values():
+                if done:
+                    os.replace(path + '.tmp', path)
+                    paths.append(path)
+                elif os.path.exists(path + '.tmp'):
+                    os.remove(path + '.tmp')
+            self.post(self.on_done, sorted(paths), exported, error)
+
+
+def backup_partition(due):
+    # Chunks are per due month, "YYYY-MM"; anything unparseable shares one
+    if isinstance(due, str) and DUE_DATE_PATTERN.match(due):
+        return f"{due[6:]}-{due[3:5]}"
+    return "undated"
+
+
+def retained_backups(stamps, daily=BACKUP_KEEP_DAILY, weekly=BACKUP_KEEP_WEEKLY, monthly=BACKUP_KEEP_MONTHLY):
+    # Grandfather-father-son retention: the newest point of each of the last
+    # `daily` days, `weekly` ISO weeks and `monthly` months is kept
+    newest_first = sorted(stamps, reverse=True)
+    keep = set()
+    for count, bucket in ((daily, lambda t: t.date()),
+                          (weekly, lambda t: t.isocalendar()[:2]),
+                          (monthly, lambda t: (t.year, t.month))):
+        seen = set()
+        for stamp in newest_first:
+            key = bucket(stamp)
+            if key in seen:
+                continue
+            if len(seen) == count:
+                break
+            seen.add(key)
+            keep.add(stamp)
+    return keep
+
+
+class BackupStore:
+    # Content-addressed backup set. A backup point is a small manifest mapping
+    # each due month to a gzip JSONL chunk named by the SHA-256 of its
+    # contents, so months that have not changed since an earlier point hash
+    # the same and are not written again. Every manifest is complete on its
+    # own: restoring a point reads that manifest and the chunks it names only.
+    STAMP_FORMAT = '%Y%m%d_%H%M%S_%f'
+
+    def __init__(self, root):
+        self.root = root
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.manifest_dir = os.path.join(root, 'manifests')
+
+    def points(self):
+        # Manifest stamps, oldest first
+        try:
+            names = os.listdir(self.manifest_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith('.json'))
+
+    def manifest(self, point):
+        with open(os.path.join(self.manifest_dir, f"{point}.json"), encoding='utf-8') as f:
+            return json.load(f)
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, f"{digest}.jsonl.gz")
+
+    def write_chunk(self, lines):
+        # Returns (digest, written); an existing chunk with the same content is reused
+        data = ''.join(lines).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        with open(path + '.tmp', 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as f:
+                f.write(data)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(path + '.tmp', path)
+        return digest, True
+
+    def write_manifest(self, manifest, created):
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        point = created.strftime(self.STAMP_FORMAT)
+        path = os.path.join(self.manifest_dir, f"{point}.json")
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        return point
+
+    def read_chunk(self, digest, count=None):
+        # Records of one chunk, hashed as they stream past; raises ValueError
+        # at the end if the content no longer matches its digest or row count
+        sha = hashlib.sha256()
+        rows = 0
+        with gzip.open(self.chunk_path(digest), 'rb') as f:
+            for line in f:
+                sha.update(line)
+                rows += 1
+                yield json.loads(line)
+        if sha.hexdigest() != digest or (count is not None and rows != count):
+            raise ValueError(f"backup chunk {digest[:12]} is corrupt")
+
+    def records(self, point):
+        # Every bill of one backup point, a chunk at a time
+        for partition, chunk in sorted(self.manifest(point)['chunks'].items()):
+            yield from self.read_chunk(chunk['hash'], chunk['count'])
+
+    def prune(self):
+        # Applies the retention policy, then deletes chunks no kept point uses
+        points = self.points()
+        stamps = {datetime.datetime.strptime(p, self.STAMP_FORMAT): p for p in points}
+        keep = {stamps[s] for s in retained_backups(stamps)}
+        removed_points = 0
+        for point in points:
+            if point not in keep:
+                os.remove(os.path.join(self.manifest_dir, f"{point}.json"))
+                removed_points += 1
+        referenced = set()
+        for point in keep:
+            referenced.update(c['hash'] for c in self.manifest(point)['chunks'].values())
+        removed_chunks = 0
+        for name in os.listdir(self.chunk_dir) if os.path.isdir(self.chunk_dir) else []:
+            if name.split('.', 1)[0] not in referenced:
+                os.remove(os.path.join(self.chunk_dir, name))
+                removed_chunks += 1
+        return removed_points, removed_chunks
+
+
+LEGACY_BILLS_ARRAY = re.compile(r'"bills"\s*:\s*\{\s*"data"\s*:\s*\[')
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def read_legacy_backup(path, read_size=RESTORE_READ_BYTES):
+    # Bills of a full JsonStore-layout backup ({"bills": {"data": [...]}}),
+    # one at a time. The array is walked with raw_decode over a buffer that
+    # holds a single read plus the record being parsed, never the whole file.
+    # gzip files are read through GzipFile, which checks their CRC at the end.
+    decoder = json.JSONDecoder()
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            data = f.read(read_size)
+            eof = not data
+            buf = buf[pos:] + data
+            pos = 0
+
+        def next_char():
+            nonlocal pos
+            while True:
+                pos = JSON_WHITESPACE.match(buf, pos).end()
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                fill()
+
+        while True:
+            match = LEGACY_BILLS_ARRAY.search(buf)
+            if match:
+                pos = match.end()
+                break
+            if eof:
+                raise ValueError("no bills found in backup")
+            fill()
+        if next_char() == ']':
+            return
+        while True:
+            next_char()
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                record, end = None, None
+            if end is None or (end == len(buf) and not eof):
+                # Record runs past the buffer (or might): read more and retry
+                if eof:
+                    raise ValueError("backup file is truncated")
+                fill()
+                continue
+            pos = end
+            yield record
+            sep = next_char()
+            if sep == ']':
+                return
+            if sep != ',':
+                raise ValueError("backup file is truncated" if not sep else "backup file is malformed")
+            pos += 1
+
+
+class RestoreCancelled(Exception):
+    pass
+
+
+class RestoreTask(WorkerTask):
+    # Restores bills from a backup on a worker thread. Records are streamed
+    # from the source, validated with Bill.from_dict exactly as load_bills
+    # does, and handed to storage.restore_bills in batches; the stored bills
+    # only change once the whole source has been read and its checksums hold.
+    name = "bill-restore"
+
+    def __init__(self, records, total, on_progress, on_done, batch_rows=RESTORE_BATCH_ROWS):
+        super().__init__()
+        self.records = records
+        self.total = total
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.batch_rows = batch_rows
+        self.stats = {'restored': 0, 'invalid': 0}
+
+    def batches(self):
+        batch = []
+        for data in self.records():
+            if self.cancelled.is_set():
+                raise RestoreCancelled()
+            try:
+                batch.append(Bill.from_dict(data).to_dict())
+            except (ValueError, TypeError, KeyError):
+                self.stats['invalid'] += 1
+                continue
+            if len(batch) >= self.batch_rows:
+                yield batch
+                self.stats['restored'] += len(batch)
+                self.post(self.on_progress, self.stats['restored'], self.total)
+                batch = []
+        if batch:
+            yield batch
+            self.stats['restored'] += len(batch)
+
+    def run(self):
+        error = None
+        try:
+            storage.restore_bills(self.batches())
+        except RestoreCancelled:
+            self.stats = None
+        except Exception as e:
+            error = e
+            log_crash(e, source="restore_bills")
+        finally:
+            self.post(self.on_done, self.stats, error)
+
+
+class BackupTask(WorkerTask):
+    # Takes a backup point on a worker thread: bills are paged out of storage,
+    # grouped into month chunks as JSON lines sorted by id (so unchanged months
+    # serialise identically), and only chunks not already stored are written.
+    name = "bill-backup"
+
+    def __init__(self, backups, on_done):
+        super().__init__()
+        self.backups = backups
+        self.on_done = on_done
+
+    def run(self):
+        result = None
+        error = None
+        try:
+            partitions = defaultdict(list)
+            for data in storage.iter_bills():
+                if self.cancelled.is_set():
+                    return
+                partitions[backup_partition(data.get('due'))].append(
+                    (str(data.get('id', '')), json.dumps(data, sort_keys=True) + '\n'))
+            created = datetime.datetime.now()
+            chunks = {}
+            written = 0
+            for partition in sorted(partitions):
+                rows = sorted(partitions.pop(partition))
+                digest, is_new = self.backups.write_chunk(line for _, line in rows)
+                chunks[partition] = {'hash': digest, 'count': len(rows)}
+                written += is_new
+            manifest = {
+                'version': 1,
+                'created': created.isoformat(),
+                'count': sum(c['count'] for c in chunks.values()),
+                'chunks': chunks,
+                'settings': {'pin': storage.get_setting('pin')}
+            }
+            point = self.backups.write_manifest(manifest, created)
+            removed_points, removed_chunks = self.backups.prune()
+            result = (point, manifest['count'], len(chunks), written, removed_points)
+        except Exception as e:
+            error = e
+            log_crash(e, source="backup_bills_write")
+        finally:
+            self.post(self.on_done, result, error)
 
-class MainScreen(Screen):
-    bills = ListProperty([])
+
+class MainScreen(NotifyMixin, Screen):
     sort_key = 'due'
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.notification_callbacks = []
+        self.view_model = BillListViewModel(self.bill_row)
+        self.search_index = TrigramIndex()
+        self.sort_indexes = {
+            'name': SortedBillIndex(lambda b: b.name.lower()),
+            'amount': SortedBillIndex(lambda b: b.amount_minor),
+            'due': SortedBillIndex(lambda b: b.due_ordinal)
+        }
+        self.month_groups = MonthGroupIndex()
+        self.duplicates = DuplicateIndex()
+        self.summary_totals = SummaryTotals()
+        self.range_totals = DueRangeTotals()
+        self.analytics = AnalyticsCube()
+        self.reminders = ReminderScheduler(self.remind)
+        self.ledger = BillLedger([self.search_index, self.month_groups, self.summary_totals, self.range_totals, self.analytics, self.duplicates, self.reminders, self.view_model] + list(self.sort_indexes.values()))
+        self.search = SearchPipeline(partial(self.update_view, refine=True), self.search_index)
+        self.importer = None
+        self.exporter = None
+        self.backup_task = None
+        self.restore_task = None
+        self.import_refresh = Clock.create_trigger(lambda dt: self.update_view(), IMPORT_REFRESH_SECONDS)
+        self.loaded = False
+
+    @property
+    def bills(self):
+        return list(self.ledger)
 
     def on_enter(self):
         try:
             self.expanded_months = set()
             today = datetime.datetime.now()
-            current_month = today.strftime('%B')
-            self.expanded_months.add(current_month)
+            self.expanded_months.add((today.year, today.month))
             if today.day >= 25:
-                next_month = (today.replace(day=28) + datetime.timedelta(days=4)).strftime('%B')
-                self.expanded_months.add(next_month)
-            self.load_bills()
+                next_month = today.replace(day=28) + datetime.timedelta(days=4)
+                self.expanded_months.add((next_month.year, next_month.month))
+            # The ledger is kept in step with storage by every edit, so it is
+            # read once; later entries (back from the summary) only redraw
+            if not self.loaded:
+                self.load_bills()
             self.update_view()
-            self.schedule_notifications()
+            self.catch_up_reminders()
         except Exception as e:
             self.notify("Error", f"Failed to initialize screen: {str(e)}")
             log_crash(e, source="on_enter")
 
     def load_bills(self):
         try:
-            if store.exists('bills'):
+            stored_bills = storage.load_bills()
+            if stored_bills:
                 valid_bills = []
-                for b in store.get('bills')['data']:
-                    if not all(k in b for k in ['name', 'amount', 'due', 'paid', 'category']):
-                        self.notify("Data Warning", f"Discarded invalid bill: {b.get('name', 'Unknown')}")
-                        continue
-                    if not isinstance(b['amount'], (int, float)) or not isinstance(b['due'], str):
-                        self.notify("Data Warning", f"Discarded invalid bill: {b.get('name', 'Unknown')}")
-                        continue
-                    if not re.match(r'^\d{2}/\d{2}/\d{4}$', b['due']):
-                        self.notify("Data Warning", f"Discarded invalid bill date: {b.get('name', 'Unknown')}")
-                        continue
+                for b in stored_bills:
                     try:
-                        datetime.datetime.strptime(b['due'], '%d/%m/%Y')
-                        valid_bills.append(b)
-                    except ValueError:
-                        self.notify("Data Warning", f"Discarded invalid bill date: {b.get('name', 'Unknown')}")
-                self.bills = valid_bills
+                        valid_bills.append(Bill.from_dict(b))
+                    except (ValueError, TypeError) as e:
+                        reason = str(e) if isinstance(e, ValueError) else "invalid bill"
+                        name = b.get('name', 'Unknown') if isinstance(b, dict) else 'Unknown'
+                        self.notify("Data Warning", f"Discarded {reason}: {name}", group=f"bills discarded: {reason}")
+                self.ledger.reset(valid_bills)
             else:
-                self.bills = []
+                self.ledger.reset([])
+            self.loaded = True
         except Exception as e:
+            # Stored bills are left alone: with one row per bill, clearing them
+            # here would turn a passing read error into losing every bill
             self.notify("Error", f"Failed to load bills: {str(e)}")
-            self.bills = []
-            store.delete('bills')
+            self.ledger.reset([])
             log_crash(e, source="load_bills")
 
-    def save_bills(self):
+    def save_bills(self, bills=None):
         try:
-            store.put('bills', data=self.bills)
+            storage.put_bills([b.to_dict() for b in (self.bills if bills is None else bills)])
         except Exception as e:
             self.notify("Error", f"Failed to save bills: {str(e)}")
             log_crash(e, source="save_bills")
 
-    def update_view(self):
+    def store_bill(self, bill, is_new=False):
         try:
-            print(f"[DEBUG] Updating view with {len(self.bills)} bills, sort_key: {self.sort_key}")
-            self.ids.rv.data = []
-            search_text = self.ids.search.text.lower()
-            today = datetime.datetime.now()
-            valid_bills = []
-
-            for b in self.bills:
-                if not all(k in b for k in ['name', 'amount', 'due', 'paid', 'category']):
-                    self.notify("Data Warning", f"Skipping invalid bill: {b.get('name', 'Unknown')}")
-                    continue
-                try:
-                    datetime.datetime.strptime(b['due'], '%d/%m/%Y')
-                    valid_bills.append(b)
-                except ValueError:
-                    self.notify("Data Warning", f"Skipping bill with invalid date: {b.get('name', 'Unknown')}")
-                    continue
-
-            filtered_bills = [
-                b for b in valid_bills
-                if (search_text in b['name'].lower() or
-                    search_text in str(b['amount']).lower() or
-                    search_text in b['due'].lower() or
-                    search_text in b.get('frequency', '').lower() or
-                    search_text in b['category'].lower())
-            ]
+            if is_new:
+                storage.add_bill(bill.to_dict())
+            else:
+                storage.update_bill(bill.to_dict())
+        except Exception as e:
+            self.notify("Error", f"Failed to save bill: {str(e)}")
+            log_crash(e, source="store_bill")
 
-            sort_functions = {
-                'name': lambda x: x['name'].lower(),
-                'amount': lambda x: float(x['amount']),
-                'due': lambda x: datetime.datetime.strptime(x['due'], '%d/%m/%Y')
-            }
-            sorted_bills = sorted(filtered_bills, key=sort_functions[self.sort_key])
+    def store_paid(self, bill):
+        try:
+            storage.set_paid(bill.id, bill.paid)
+        except Exception as e:
+            self.notify("Error", f"Failed to save bill: {str(e)}")
+            log_crash(e, source="store_paid")
 
-            grouped = defaultdict(list)
-            for b in sorted_bills:
-                try:
-                    month = datetime.datetime.strptime(b['due'], '%d/%m/%Y').strftime('%B')
-                    grouped[month].append(b)
-                except ValueError:
-                    self.notify("Data Warning", f"Invalid due date for bill: {b['name']}")
-                    continue
+    def remove_stored_bill(self, bill):
+        try:
+            storage.delete_bill(bill.id)
+        except Exception as e:
+            self.notify("Error", f"Failed to delete bill: {str(e)}")
+            log_crash(e, source="remove_stored_bill")
 
-            for month, bills in grouped.items():
-                total = sum(float(b['amount']) for b in bills)
+    def update_view(self, refine=False):
+        try:
+            print(f"[DEBUG] Updating view with {len(self.ledger)} bills, sort_key: {self.sort_key}")
+            view_model = self.view_model
+            currency_symbol = App.get_running_app().currency_symbol
+            rows = []
+            search_text = self.ids.search.text.lower()
+            today = datetime.date.today().toordinal()
+            view_model.set_context(today, currency_symbol)
+
+            matches = self.search.filter(search_text, refine)
+            if matches is None and self.sort_key == 'due':
+                # Unfiltered date order: months come from the month index and
+                # only expanded ones read their bills, via a due-date range
+                due_index = self.sort_indexes['due']
+                grouped = {}
+                for key in sorted(self.month_groups.groups):
+                    if key in self.expanded_months:
+                        grouped[key] = [self.ledger.get(i) for i in due_index.range(*month_span(key))]
+                    else:
+                        grouped[key] = ()
+            else:
+                sorted_bills = [self.ledger.get(i) for i in self.sort_indexes[self.sort_key].ordered(matches)]
+                grouped = defaultdict(list)
+                for b in sorted_bills:
+                    grouped[month_key(b.due_ordinal)].append(b)
+
+            for key, bills in grouped.items():
+                if matches is None:
+                    group = self.month_groups.groups[key]
+                    total = group.total_minor / 100
+                    overdue = group.overdue_count(today)
+                else:
+                    total = sum(b.amount_minor for b in bills) / 100
+                    overdue = sum(1 for b in bills if b.is_overdue(today))
+                month = datetime.date(key[0], key[1], 1).strftime('%B')
                 color = self.month_color(month)
-                is_expanded = month in self.expanded_months
+                is_expanded = key in self.expanded_months
+                title = f"{month.upper()} {key[0]}"
+                if not is_expanded:
+                    text = f"▶ {title} (Tap to Expand)"
+                elif overdue:
+                    text = f"▼ {title} (Total: {currency_symbol}{total:.2f}, {overdue} overdue)"
+                else:
+                    text = f"▼ {title} (Total: {currency_symbol}{total:.2f})"
 
-                self.ids.rv.data.append({
-                    'text': f"▶ {month.upper()} (Tap to Expand)" if not is_expanded else f"▼ {month.upper()} (Total: {App.get_running_app().currency_symbol}{total:.2f})",
-                    'on_release': partial(self.toggle_month, month),
+                rows.append(view_model.row(('month', key), text, lambda: {
+                    'text': text,
+                    'on_release': partial(self.toggle_month, key),
                     'background_color': color,
                     'color': (1, 1, 1, 1),
                     'font_size': '18sp'
-                })
+                }))
 
                 if is_expanded:
-                    for b in bills:
-                        due_date = datetime.datetime.strptime(b['due'], '%d/%m/%Y')
-                        is_overdue = due_date < today and not b['paid']
-                        icon = BILL_CATEGORIES.get(b['category'], '💸')
-                        self.ids.rv.data.append({
-                            'text': f"{icon} {b['name']}: {App.get_running_app().currency_symbol}{b['amount']} (Due: {b['due']}){' ✓' if b['paid'] else ' ⚠' if is_overdue else ''}",
-                            'on_release': partial(self.edit_bill, b),
-                            'background_color': (0.3, 0.7, 0.3, 1) if b['paid'] else (1, 0.4, 0.4, 1) if is_overdue else (1, 1, 1, 1),
-                            'color': (1, 1, 1, 1),
-                            'font_size': '16sp',
-                            'on_press': lambda *args, b=b: self.animate_button(args[0] if args else None)
-                        })
-
-            if not self.ids.rv.data:
-                self.ids.rv.data = [{
+                    rows.extend(view_model.bill_row(b) for b in bills)
+
+            if not rows:
+                rows.append(view_model.row(('empty',), None, lambda: {
                     'text': 'No bills found. Tap "Add Bill" to start.',
                     'on_release': lambda x: None,
                     'background_color': (0.5, 0.5, 0.5, 1),
                     'color': (1, 1, 1, 1),
                     'font_size': '16sp'
-                }]
+                }))
 
-            remaining = sum(float(b['amount']) for b in valid_bills if not b['paid'])
-            self.ids.remaining.text = f"Remaining to Pay: {App.get_running_app().currency_symbol}{remaining:.2f}"
+            remaining = self.month_groups.unpaid_minor() / 100
+            self.ids.remaining.text = f"Remaining to Pay: {currency_symbol}{remaining:.2f}"
 
-            self.ids.rv.data = self.ids.rv.data
-            self.ids.rv.refresh_from_data()
-            print(f"[DEBUG] RV data set with {len(self.ids.rv.data)} items")
+            changed = view_model.apply(self.ids.rv, rows)
+            print(f"[DEBUG] RV data has {len(rows)} items, {changed} changed")
         except Exception as e:
             self.notify("Error", f"Failed to update view: {str(e)}")
             log_crash(e, source="update_view")
 
+    def bill_row(self, b, today, currency_symbol):
+        is_overdue = b.is_overdue(today)
+        icon = BILL_CATEGORIES.get(b.category, '💸')
+        return {
+            'text': f"{icon} {b.name}: {currency_symbol}{b.amount} (Due: {b.due}){' ✓' if b.paid else ' ⚠' if is_overdue else ''}",
+            'on_release': partial(self.edit_bill, b),
+            'background_color': (0.3, 0.7, 0.3, 1) if b.paid else (1, 0.4, 0.4, 1) if is_overdue else (1, 1, 1, 1),
+            'color': (1, 1, 1, 1),
+            'font_size': '16sp',
+            'on_press': lambda *args: self.animate_button(args[0] if args else None)
+        }
+
     def animate_button(self, instance):
         try:
             if instance and hasattr(instance, 'background_color'):
@@ -761,6 +3422,7 @@ class MainScreen(Screen):
     def clear_search(self):
         try:
             self.ids.search.text = ''
+            self.search.cancel()
             self.update_view()
         except Exception as e:
             self.notify("Error", f"Failed to clear search: {str(e)}")
@@ -794,18 +3456,18 @@ class MainScreen(Screen):
         try:
             is_edit = bill is not None
             content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-            name_input = TextInput(text=bill['name'] if is_edit else '', hint_text="Bill Name", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            amount_input = TextInput(text=str(bill['amount']) if is_edit else '', hint_text="Amount", input_filter='float', multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            due_input = TextInput(text=bill['due'] if is_edit else '', hint_text="Due Date (DD/MM/YYYY)", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
+            name_input = TextInput(text=bill.name if is_edit else '', hint_text="Bill Name", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
+            amount_input = TextInput(text=str(bill.amount) if is_edit else '', hint_text="Amount", input_filter='float', multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
+            due_input = TextInput(text=bill.due if is_edit else '', hint_text="Due Date (DD/MM/YYYY)", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
             category_input = Spinner(
-                text=bill.get('category', 'Select Category') if is_edit else 'Select Category',
+                text=bill.category if is_edit else 'Select Category',
                 values=list(BILL_CATEGORIES.keys()),
                 size_hint_y=None,
                 height=40,
                 background_color=(0.2, 0.7, 0.7, 1)
             )
             freq_input = Spinner(
-                text=bill.get('frequency', 'Select Frequency') if is_edit else 'Select Frequency',
+                text=(bill.frequency or 'Select Frequency') if is_edit else 'Select Frequency',
                 values=('Weekly', '4 Weekly', 'Monthly', 'Custom'),
                 size_hint_y=None,
                 height=40,
@@ -838,7 +3500,7 @@ class MainScreen(Screen):
 
             save_btn = Button(text="Save", size_hint_y=None, height=40, background_normal='', background_color=(0.2, 0.7, 0.7, 1))
             complete_btn = Button(
-                text=("Mark as Unpaid" if bill and bill.get('paid') else "Mark as Paid"),
+                text=("Mark as Unpaid" if bill and bill.paid else "Mark as Paid"),
                 size_hint_y=None, height=40, background_normal='', background_color=(0.3, 0.7, 0.3, 1)
             )
             if is_edit:
@@ -896,42 +3558,30 @@ class MainScreen(Screen):
                 return
 
             if bill is None:
-                if frequency == 'Weekly':
-                    due_date += datetime.timedelta(weeks=1)
-                elif frequency == '4 Weekly':
-                    due_date += datetime.timedelta(weeks=4)
-                elif frequency == 'Monthly':
-                    month = due_date.month + 1 if due_date.month < 12 else 1
-                    year = due_date.year + 1 if month == 1 else due_date.year
-                    try:
-                        due_date = due_date.replace(month=month, year=year)
-                    except ValueError:
-                        due_date = due_date.replace(day=28, month=month, year=year)
-
-            while due_date.weekday() >= 5 or due_date.strftime('%d/%m') in BANK_HOLIDAYS:
-                due_date += datetime.timedelta(days=1)
-
-            due_formatted = due_date.strftime('%d/%m/%Y')
+                due_date = advance_due(due_date, frequency)
+            due = business_days.next_business_day(due_date.toordinal())
+            amount_minor = round(amount_float * 100)
+            key = bill_fingerprint(name, amount_minor, due, category)
+            if self.duplicates.find(key, exclude=bill.id if bill else None) is not None:
+                error_label.text = f"{name} is already due on {datetime.date.fromordinal(due).strftime('%d/%m/%Y')}"
+                return
 
             if bill:
-                bill['name'] = name
-                bill['amount'] = amount_float
-                bill['due'] = due_formatted
-                bill['category'] = category
-                bill['frequency'] = frequency
+                self.ledger.update(
+                    bill,
+                    name=name,
+                    amount_minor=amount_minor,
+                    due_ordinal=due,
+                    category=sys.intern(category),
+                    frequency=sys.intern(frequency)
+                )
+                self.store_bill(bill)
             else:
-                self.bills.append({
-                    'name': name,
-                    'amount': amount_float,
-                    'paid': False,
-                    'due': due_formatted,
-                    'category': category,
-                    'frequency': frequency
-                })
-
-            self.save_bills()
+                new_bill = Bill(new_bill_id(), name, amount_minor, False, due, category, frequency)
+                self.ledger.add(new_bill)
+                self.store_bill(new_bill, is_new=True)
+
             self.update_view()
-            self.schedule_notifications()
             popup.dismiss()
             self.notify("Bill Saved", f"{'Updated' if bill else 'Added'} {name}")
         except Exception as e:
@@ -942,36 +3592,26 @@ class MainScreen(Screen):
     def mark_bill_paid(self, bill, popup):
         try:
             if bill:
-                bill['paid'] = not bill['paid']
-                if bill['paid'] and bill['frequency'] != 'Custom':
+                self.ledger.update(bill, paid=not bill.paid)
+                if bill.paid and bill.frequency != 'Custom':
                     try:
-                        due_date = datetime.datetime.strptime(bill['due'], '%d/%m/%Y')
-                        if bill['frequency'] == 'Weekly':
-                            due_date += datetime.timedelta(weeks=1)
-                        elif bill['frequency'] == '4 Weekly':
-                            due_date += datetime.timedelta(weeks=4)
-                        elif bill['frequency'] == 'Monthly':
-                            month = due_date.month + 1 if due_date.month < 12 else 1
-                            year = due_date.year + 1 if month == 1 else due_date.year
-                            try:
-                                due_date = due_date.replace(month=month, year=year)
-                            except ValueError:
-                                due_date = due_date.replace(day=28, month=month, year=year)
-                        while due_date.weekday() >= 5 or due_date.strftime('%d/%m') in BANK_HOLIDAYS:
-                            due_date += datetime.timedelta(days=1)
+                        due_date = advance_due(bill.due_date, bill.frequency)
                         new_bill = bill.copy()
-                        new_bill['due'] = due_date.strftime('%d/%m/%Y')
-                        new_bill['paid'] = False
-                        self.bills.append(new_bill)
-                        self.notify("Bill Added", f"Next {bill['name']} due on {new_bill['due']}")
+                        new_bill.id = new_bill_id()
+                        new_bill.due_ordinal = business_days.next_business_day(due_date.toordinal())
+                        new_bill.paid = False
+                        # Paying, unpaying and paying again must not add the next bill twice
+                        if self.duplicates.find(DuplicateIndex.key(new_bill)) is None:
+                            self.ledger.add(new_bill)
+                            self.store_bill(new_bill, is_new=True)
+                            self.notify("Bill Added", f"Next {bill.name} due on {new_bill.due}")
                     except Exception as e:
                         self.notify("Error", f"Failed to create next bill: {str(e)}")
                         log_crash(e, source="mark_bill_paid_next")
-                self.save_bills()
+                self.store_paid(bill)
                 self.update_view()
-                self.schedule_notifications()
                 popup.dismiss()
-                self.notify("Bill Updated", f"{bill['name']} marked as {'paid' if bill['paid'] else 'unpaid'}")
+                self.notify("Bill Updated", f"{bill.name} marked as {'paid' if bill.paid else 'unpaid'}")
         except Exception as e:
             self.notify("Error", f"Failed to mark bill paid: {str(e)}")
             log_crash(e, source="mark_bill_paid")
@@ -979,7 +3619,7 @@ class MainScreen(Screen):
     def confirm_delete(self, bill, popup):
         try:
             content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-            content.add_widget(Label(text=f"Delete '{bill['name']}'? This cannot be undone."))
+            content.add_widget(Label(text=f"Delete '{bill.name}'? This cannot be undone."))
             confirm_btn = Button(text="Delete", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.4, 0.4, 1))
             cancel_btn = Button(text="Cancel", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
             content.add_widget(confirm_btn)
@@ -995,20 +3635,19 @@ class MainScreen(Screen):
 
     def delete_bill(self, bill, popup, confirm_popup):
         try:
-            self.bills.remove(bill)
-            self.save_bills()
+            self.ledger.remove(bill)
+            self.remove_stored_bill(bill)
             self.update_view()
-            self.schedule_notifications()
             popup.dismiss()
             confirm_popup.dismiss()
-            self.notify("Bill Deleted", f"{bill['name']} has been deleted")
+            self.notify("Bill Deleted", f"{bill.name} has been deleted")
         except Exception as e:
             self.notify("Error", f"Failed to delete bill: {str(e)}")
             log_crash(e, source="delete_bill")
 
     def filter_bills(self, text):
         try:
-            self.update_view()
+            self.search.submit()
         except Exception as e:
             self.notify("Error", f"Failed to filter bills: {str(e)}")
             log_crash(e, source="filter_bills")
@@ -1030,8 +3669,53 @@ class MainScreen(Screen):
             log_crash(e, source="get_export_dir")
             return os.path.join(os.path.expanduser('~'), 'Documents', 'BillsManager_Exports')
 
-    def export_bills(self):
+    def open_export_popup(self):
+        try:
+            content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+            popup = Popup(title="Export Bills", content=content, size_hint=(0.8, 0.5))
+            if self.exporter is not None and self.exporter.running:
+                content.add_widget(Label(text="An export is already running."))
+                stop_btn = Button(text="Cancel Export", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.4, 0.4, 1))
+                close_btn = Button(text="Close", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+                content.add_widget(stop_btn)
+                content.add_widget(close_btn)
+                stop_btn.bind(on_release=lambda x: (self.exporter.cancel(), popup.dismiss()))
+                close_btn.bind(on_release=lambda x: popup.dismiss())
+                popup.open()
+                return
+
+            fmt = storage.get_setting('export_format', 'CSV')
+            format_spinner = Spinner(text=fmt if fmt in EXPORT_FORMATS else 'CSV', values=list(EXPORT_FORMATS),
+                                     size_hint_y=None, height=40, background_color=(0.2, 0.6, 0.6, 1))
+            by_year_row = BoxLayout(size_hint_y=None, height=40)
+            by_year = CheckBox(active=bool(storage.get_setting('export_by_year', False)), size_hint_x=0.2)
+            by_year_row.add_widget(by_year)
+            by_year_row.add_widget(Label(text="One file per year"))
+            export_btn = Button(text="Export", size_hint_y=None, height=40, background_normal='', background_color=(0.2, 0.7, 0.7, 1))
+            cancel_btn = Button(text="Cancel", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            content.add_widget(format_spinner)
+            content.add_widget(by_year_row)
+            content.add_widget(export_btn)
+            content.add_widget(cancel_btn)
+
+            def start_export(*args):
+                popup.dismiss()
+                storage.put_setting('export_format', format_spinner.text)
+                storage.put_setting('export_by_year', by_year.active)
+                self.export_bills(format_spinner.text, by_year.active)
+
+            export_btn.bind(on_release=start_export)
+            cancel_btn.bind(on_release=lambda x: popup.dismiss())
+            popup.open()
+        except Exception as e:
+            self.notify("Error", f"Failed to open export options: {str(e)}")
+            log_crash(e, source="open_export_popup")
+
+    def export_bills(self, fmt='CSV', by_year=False):
         try:
+            if self.exporter is not None and self.exporter.running:
+                self.notify("Export In Progress", "Wait for the current export to finish")
+                return
             if platform == 'android':
                 try:
                     from android.permissions import request_permissions, Permission, check_permission
@@ -1043,1559 +3727,602 @@ class MainScreen(Screen):
                     return
             export_dir = self.get_export_dir()
             os.makedirs(export_dir, exist_ok=True)
-            export_path = os.path.join(export_dir, "bills_export.csv")
-            with open(export_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Name", "Amount", "Paid", "Due", "Category", "Frequency"])
-                for b in self.bills:
-                    writer.writerow([b['name'], b['amount'], b['paid'], b['due'], b['category'], b.get('frequency', '')])
-            self.notify("Bills Exported", f"Saved to {export_path}")
+            self.exporter = BillExporter(export_dir, fmt, by_year, self.on_export_progress, self.on_export_done)
+            self.exporter.start()
         except PermissionError:
             self.notify("Export Failed", "Permission denied. Please grant storage access.")
         except Exception as e:
             self.notify("Export Failed", f"Error: {str(e)}")
             log_crash(e, source="export_bills")
 
-    def import_bills(self):
-        try:
-            if platform == 'android':
-                try:
-                    from android.permissions import request_permissions, Permission, check_permission
-                    if not check_permission(Permission.READ_EXTERNAL_STORAGE):
-                        request_permissions([Permission.WRITE_EXTERNAL_STORAGE, Permission.READ_EXTERNAL_STORAGE])
-                except Exception as e:
-                    self.notify("Permission Error", f"Failed to request permissions: {str(e)}")
-                    log_crash(e, source="import_bills_permissions")
-                    return
-            import_dir = self.get_export_dir()
-            import_paths = [
-                os.path.join(import_dir, "bills_import.csv"),
-                os.path.join(import_dir, "bills_import.txt")
-            ]
-            imported = False
-            for import_path in import_paths:
-                if not os.path.exists(import_path):
-                    continue
-                try:
-                    with open(import_path, "r", newline="", encoding="utf-8") as f:
-                        first_line = f.readline().strip()
-                        f.seek(0)
-                        required_fields = ["Name", "Amount", "Paid", "Due", "Category"]
-                        is_csv = import_path.endswith(".csv")
-                        if is_csv:
-                            reader = csv.DictReader(f)
-                            if not all(field in reader.fieldnames for field in required_fields):
-                                self.notify("Import Warning", f"Invalid headers in {import_path}")
-                                continue
-                        else:
-                            if not all(field in first_line.split(",") for field in required_fields):
-                                self.notify("Import Warning", f"Invalid headers in {import_path}")
-                                continue
-                            next(f)
-                            reader = [dict(zip(first_line.split(","), line.strip().split(","))) for line in f if line.strip()]
-                        for row in reader:
-                            if not all(field in row for field in required_fields):
-                                self.notify("Import Warning", f"Skipped invalid bill: Missing fields in {row.get('Name', 'Unknown')}")
-                                continue
-                            if not re.match(r'^\d{2}/\d{2}/\d{4}$', row['Due']):
-                                self.notify("Import Warning", f"Skipped invalid bill: Invalid date in {row.get('Name', 'Unknown')}")
-                                continue
-                            try:
-                                amount = float(row['Amount'])
-                                if amount <= 0:
-                                    raise ValueError
-                                datetime.datetime.strptime(row['Due'], '%d/%m/%Y')
-                                self.bills.append({
-                                    'name': row['Name'],
-                                    'amount': amount,
-                                    'paid': row['Paid'].lower() == 'true',
-                                    'due': row['Due'],
-                                    'category': row['Category'] if row['Category'] in BILL_CATEGORIES else 'Other',
-                                    'frequency': row.get('Frequency', 'Custom')
-                                })
-                            except (ValueError, KeyError):
-                                self.notify("Import Warning", f"Skipped invalid bill: {row.get('Name', 'Unknown')}")
-                                continue
-                        self.notify("Bills Imported", f"Imported from {import_path}")
-                        imported = True
-                except FileNotFoundError:
-                    self.notify("Import Failed", f"No import file found at {import_path}")
-                except Exception as e:
-                    self.notify("Import Failed", f"Error reading {import_path}: {str(e)}")
-                    log_crash(e, source="import_bills_read")
-            if not imported:
-                self.notify("Import Failed", f"No valid import files found in {import_dir}")
-            if imported:
-                self.save_bills()
-                self.update_view()
-                self.schedule_notifications()
-        except Exception as e:
-            self.notify("Error", f"Failed to import bills: {str(e)}")
-            log_crash(e, source="import_bills")
+    def on_export_progress(self, exported, total):
+        self.show_toast(f"Exporting bills... {exported}/{total}")
 
-    def backup_bills(self):
-        try:
-            export_dir = self.get_export_dir()
-            os.makedirs(export_dir, exist_ok=True)
-            backup_path = os.path.join(export_dir, f"bills_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            store.export(backup_path)
-            self.notify("Backup Created", f"Saved to {backup_path}")
-        except Exception as e:
-            self.notify("Backup Failed", f"Error: {str(e)}")
-            log_crash(e, source="backup_bills")
-
-    def schedule_notifications(self):
-        try:
-            for callback in self.notification_callbacks:
-                Clock.unschedule(callback)
-            self.notification_callbacks = []
-            today = datetime.datetime.now()
-            for bill in self.bills:
-                if bill['paid']:
-                    continue
-                try:
-                    due_date = datetime.datetime.strptime(bill['due'], '%d/%m/%Y')
-                    if due_date > today:
-                        def callback(dt, b=bill):
-                            self.notify("Bill Due Soon", f"{b['name']} due on {b['due']}")
-                        delta = (due_date - today).total_seconds()
-                        if delta > 0:
-                            Clock.schedule_once(callback, max(delta - 86400, 0))
-                            self.notification_callbacks.append(callback)
-                except ValueError:
-                    self.notify("Notification Error", f"Invalid date for {bill['name']}")
-        except Exception as e:
-            self.notify("Error", f"Failed to schedule notifications: {str(e)}")
-            log_crash(e, source="schedule_notifications")
-
-    def notify(self, title, message):
-        try:
-            notification.notify(title=title, message=message, timeout=5)
-        except Exception as e:
-            print(f"[ERROR] Notification failed: {str(e)}")
-            self.show_toast(message)
-
-    def show_toast(self, message):
-        try:
-            toast = Popup(
-                title='',
-                content=Label(text=message, color=(1, 1, 1, 1)),
-                size_hint=(0.8, 0.2),
-                pos_hint={'center_x': 0.5, 'top': 0.9},
-                auto_dismiss=True
-            )
-            toast.open()
-            Clock.schedule_once(lambda dt: toast.dismiss(), 2)
-        except Exception as e:
-            print(f"[ERROR] Toast failed: {str(e)}")
-            log_crash(e, source="show_toast")
-
-class SummaryScreen(Screen):
-    def on_enter(self):
-        try:
-            today = datetime.datetime.now()
-            total_paid = sum(float(b['amount']) for b in self.manager.get_screen('main').bills if b['paid'])
-            total_remaining = sum(float(b['amount']) for b in self.manager.get_screen('main').bills if not b['paid'])
-            overdue = sum(
-                float(b['amount']) for b in self.manager.get_screen('main').bills
-                if not b['paid'] and datetime.datetime.strptime(b['due'], '%d/%m/%Y') < today
-            )
-
-            currency_symbol = App.get_running_app().currency_symbol
-            self.ids.total_paid.text = f"Total Paid: {currency_symbol}{total_paid:.2f}"
-            self.ids.total_remaining.text = f"Total Remaining: {currency_symbol}{total_remaining:.2f}"
-            self.ids.overdue.text = f"Overdue: {currency_symbol}{overdue:.2f}"
-
-            container = self.ids.chart_container
-            container.clear_widgets()
-            try:
-                from kivy_garden.graph import Graph, PiePlot
-                graph = Graph(
-                    xlabel='', ylabel='', x_ticks_minor=0, x_ticks_major=0,
-                    y_ticks_major=0, y_grid_label=False, x_grid_label=False, padding=5
-                )
-                total = total_paid + total_remaining + overdue
-                if total > 0:
-                    plot = PiePlot()
-                    plot.points = [
-                        (total_paid, (0.3, 0.7, 0.3, 1)),
-                        (total_remaining, (1, 0.4, 0.4, 1)),
-                        (overdue, (1, 0.2, 0.2, 1))
-                    ]
-                    plot.labels = ['Paid', 'Remaining', 'Overdue']
-                    graph.add_plot(plot)
-                    container.add_widget(graph)
-                else:
-                    container.add_widget(Label(text="No data to display"))
-            except ImportError:
-                container.add_widget(Label(text="Pie chart unavailable (install kivy-garden.graph)"))
-            except Exception as e:
-                container.add_widget(Label(text=f"Chart error: {str(e)}"))
-                log_crash(e, source="summary_chart")
-        except Exception as e:
-            self.notify("Error", f"Failed to load summary: {str(e)}")
-            log_crash(e, source="summary_on_enter")
-
-    def notify(self, title, message):
-        try:
-            notification.notify(title=title, message=message, timeout=5)
-        except Exception as e:
-            print(f"[ERROR] Notification failed: {str(e)}")
-            self.show_toast(message)
-
-    def show_toast(self, message):
-        try:
-            toast = Popup(
-                title='',
-                content=Label(text=message, color=(1, 1, 1, 1)),
-                size_hint=(0.8, 0.2),
-                pos_hint={'center_x': 0.5, 'top': 0.9},
-                auto_dismiss=True
-            )
-            toast.open()
-            Clock.schedule_once(lambda dt: toast.dismiss(), 2)
-        except Exception as e:
-            print(f"[ERROR] Toast failed: {str(e)}")
-            log_crash(e, source="summary_show_toast")
-
-class BillsManagerApp(App):
-    theme = 'dark'
-    currency_symbol = CURRENCY_SYMBOL
-
-    def build(self):
-        try:
-            return Builder.load_string(KV)
-        except Exception as e:
-            log_crash(e, source="app_build")
-            raise
-
-    def switch_theme(self):
-        try:
-            self.theme = 'light' if self.theme == 'dark' else 'dark'
-            for screen in self.root.screens:
-                screen.canvas.before.clear()
-                with screen.canvas.before:
-                    Color(rgba=get_color_from_hex('#1A2E4B') if self.theme == 'dark' else get_color_from_hex('#E6F0FA'))
-                    Rectangle(pos=screen.pos, size=screen.size)
-                    Color(rgba=get_color_from_hex('#2E4A7D') if self.theme == 'dark' else get_color_from_hex('#A3CFFA'))
-                    Rectangle(pos=(screen.x, screen.y + screen.height * 0.5), size=(screen.width, screen.height * 0.5))
-                for widget in screen.walk(restrict=True):
-                    if isinstance(widget, (Label, Button, TextInput)):
-                        if isinstance(widget, Label) and hasattr(widget, 'id') and widget.id == 'remaining':
-                            widget.color = get_color_from_hex('#FFD700') if self.theme == 'dark' else get_color_from_hex('#FF8C00')
-                        elif isinstance(widget, Label) and widget.id in ['total_paid', 'total_remaining']:
-                            widget.color = get_color_from_hex('#FFFFFF') if self.theme == 'dark' else get_color_from_hex('#000000')
-                        elif isinstance(widget, Label) and hasattr(widget, 'id') and widget.id == 'overdue':
-                            widget.color = get_color_from_hex('#FF6666') if self.theme == 'dark' else get_color_from_hex('#CC3333')
-                        elif isinstance(widget, Button):
-                            if widget.text == 'Unlock':
-                                widget.background_color = get_color_from_hex('#339999') if self.theme == 'dark' else get_color_from_hex('#66CCCC')
-                            elif widget.text == 'Change PIN':
-                                widget.background_color = get_color_from_hex('#994433') if self.theme == 'dark' else get_color_from_hex('#CC8866')
-                            elif widget.text == 'Toggle Theme':
-                                widget.background_color = get_color_from_hex('#555555') if self.theme == 'dark' else get_color_from_hex('#AAAAAA')
-                            elif widget.text == 'Test Crash':
-                                widget.background_color = get_color_from_hex('#FF4444') if self.theme == 'dark' else get_color_from_hex('#FF6666')
-                            elif widget.text == 'Clear':
-                                widget.background_color = get_color_from_hex('#994433') if self.theme == 'dark' else get_color_from_hex('#CC8866')
-                            elif widget.text in ['Sort: Name', 'Sort: Amount', 'Sort: Due']:
-                                widget.background_color = get_color_from_hex('#339999') if self.theme == 'dark' else get_color_from_hex('#66CCCC')
-                            elif widget.text == 'Add Bill':
-                                widget.background_color = get_color_from_hex('#339999') if self.theme == 'dark' else get_color_from_hex('#66CCCC')
-                            elif widget.text == 'Summary':
-                                widget.background_color = get_color_from_hex('#994433') if self.theme == 'dark' else get_color_from_hex('#CC8866')
-                            elif widget.text == 'Backup':
-                                widget.background_color = get_color_from_hex('#669933') if self.theme == 'dark' else get_color_from_hex('#99CC66')
-                            elif widget.text == 'Import':
-                                widget.background_color = get_color_from_hex('#555555') if self.theme == 'dark' else get_color_from_hex('#AAAAAA')
-                            elif widget.text == 'Back to Bills':
-                                widget.background_color = get_color_from_hex('#339999') if self.theme == 'dark' else get_color_from_hex('#66CCCC')
-                            widget.color = get_color_from_hex('#FFFFFF') if self.theme == 'dark' else get_color_from_hex('#000000')
-                        elif isinstance(widget, TextInput):
-                            widget.background_color = get_color_from_hex('#FFFFFF1A') if self.theme == 'dark' else get_color_from_hex('#0000001A')
-                            widget.foreground_color = get_color_from_hex('#FFFFFF') if self.theme == 'dark' else get_color_from_hex('#000000')
-                if screen.name == 'main':
-                    screen.update_view()
-        except Exception as e:
-            log_crash(e, source="switch_theme")
-            self.root.screens[0].notify("Error", f"Failed to switch theme: {str(e)}")
-
-if __name__ == '__main__':
-    try:
-        BillsManagerApp().run()
-    except Exception as e:
-        log_crash(e, source="main")
-=======
-import sys
-from kivy.app import App
-from kivy.lang import Builder
-from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.properties import ListProperty
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.popup import Popup
-from kivy.storage.jsonstore import JsonStore
-from kivy.core.window import Window
-from kivy.uix.textinput import TextInput
-from kivy.uix.button import Button
-from kivy.uix.spinner import Spinner
-from kivy.uix.label import Label
-from kivy.uix.floatlayout import FloatLayout
-from kivy.animation import Animation
-from kivy.metrics import dp
-from kivy.graphics import Color, Rectangle
-from plyer import notification
-from functools import partial
-import csv
-import os
-import datetime
-from collections import defaultdict
-from kivy.utils import platform, get_color_from_hex
-import re
-import hashlib
-import holidays
-from kivy.clock import Clock
-import locale
-import traceback
-
-# Set locale for currency and date formatting
-try:
-    locale.setlocale(locale.LC_ALL, '')
-    CURRENCY_SYMBOL = locale.currency(0).strip('0.00') or '$'
-except:
-    CURRENCY_SYMBOL = '$'
-
-# Set window size for testing (optional, remove for mobile)
-# Window.size = (360, 640)  # Commented out for full screen on mobile
-
-# Data storage
-STORE_FILE = "bills_store.json"
-store = JsonStore(STORE_FILE)
-DEFAULT_PIN = "1234"
-
-# UK bank holidays
-current_year = datetime.datetime.now().year
-uk_holidays = holidays.UnitedKingdom(years=range(current_year, current_year + 10))
-BANK_HOLIDAYS = [d.strftime('%d/%m') for d in uk_holidays]
-
-# Bill categories and icons
-BILL_CATEGORIES = {
-    'Utilities': '⚡',
-    'Rent': '🏠',
-    'Subscriptions': '📺',
-    'Insurance': '🛡️',
-    'Groceries': '🛒',
-    'Other': '💸'
-}
-
-# Robust crash logging function
-def log_crash(e, source="Unknown"):
-    try:
-        print(f"[CRASH] Logging crash from {source}: {str(e)}")
-        save_dirs = []
-        if platform == 'android':
-            try:
-                from jnius import autoclass
-                Environment = autoclass('android.os.Environment')
-                save_dirs.append(os.path.join(
-                    Environment.getExternalStoragePublicDirectory(Environment.DIRECTORY_DOCUMENTS).getPath(),
-                    'BillsManager_Logs'
-                ))
-                print(f"[CRASH] Android primary save_dir: {save_dirs[-1]}")
-            except Exception as jnius_error:
-                print(f"[CRASH] jnius error: {str(jnius_error)}")
-            save_dirs.append(os.path.join(os.path.expanduser('~'), 'BillsManager_Logs'))
-            print(f"[CRASH] Android fallback save_dir: {save_dirs[-1]}")
-        else:
-            save_dirs.append(os.path.expanduser('~/Desktop'))
-            print(f"[CRASH] Desktop save_dir: {save_dirs[-1]}")
-        save_dirs.append(os.getcwd())
-        print(f"[CRASH] CWD fallback save_dir: {save_dirs[-1]}")
-
-        log_file = None
-        for save_dir in save_dirs:
-            try:
-                os.makedirs(save_dir, exist_ok=True)
-                print(f"[CRASH] Created/verified directory: {save_dir}")
-                log_file = os.path.join(save_dir, 'bills_manager_crash.log')
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    f.write(f"\n--- Crash Report: {datetime.datetime.now()} (Source: {source}) ---\n")
-                    f.write(f"Exception: {str(e)}\n")
-                    f.write("Stack Trace:\n")
-                    f.write(traceback.format_exc())
-                    f.write("\n" + "-"*50 + "\n")
-                print(f"[CRASH] Successfully wrote to {log_file}")
-                return
-            except Exception as log_error:
-                print(f"[CRASH] Failed to write to {save_dir}: {str(log_error)}")
-                continue
-
-        print(f"[CRASH] All logging attempts failed. Exception: {str(e)}")
-        print(f"[CRASH] Stack Trace:\n{traceback.format_exc()}")
-    except Exception as log_error:
-        print(f"[CRASH] Fatal error in log_crash: {str(log_error)}")
-
-# Global exception handler
-def global_exception_handler(exc_type, exc_value, exc_traceback):
-    try:
-        print(f"[CRASH] Unhandled exception caught: {exc_type.__name__}: {str(exc_value)}")
-        log_crash(exc_value, source="Global Exception Handler")
-    except Exception as handler_error:
-        print(f"[CRASH] Error in global exception handler: {str(handler_error)}")
-    sys.__excepthook__(exc_type, exc_value, exc_traceback)
-
-sys.excepthook = global_exception_handler
-
-# Kivy Layout String with theme support
-KV = '''
-#:import C kivy.utils.get_color_from_hex
-
-ScreenManager:
-    LoginScreen:
-    MainScreen:
-    SummaryScreen:
-
-<LoginScreen>:
-    name: 'login'
-    FloatLayout:
-        canvas.before:
-            Color:
-                rgba: C('#1A2E4B') if app.theme == 'dark' else C('#E6F0FA')
-            Rectangle:
-                pos: self.pos
-                size: self.size
-            Color:
-                rgba: C('#2E4A7D') if app.theme == 'dark' else C('#A3CFFA')
-            Rectangle:
-                pos: self.x, self.y + self.height * 0.5
-                size: self.width, self.height * 0.5
-        BoxLayout:
-            orientation: 'vertical'
-            spacing: 20
-            padding: 30
-            pos_hint: {'center_x': 0.5, 'center_y': 0.5}
-            size_hint: 0.9, 0.6
-            canvas.before:
-                Color:
-                    rgba: C('#FFFFFF1A') if app.theme == 'dark' else C('#0000001A')
-                RoundedRectangle:
-                    pos: self.pos
-                    size: self.size
-                    radius: [20]
-            Label:
-                text: "Bill Manager"
-                font_size: '30sp'
-                bold: True
-                color: C('#FFD700') if app.theme == 'dark' else C('#FF8C00')
-            TextInput:
-                id: pin_input
-                password: True
-                multiline: False
-                font_size: '20sp'
-                hint_text: 'Enter 4-digit PIN'
-                background_color: C('#FFFFFF1A') if app.theme == 'dark' else C('#0000001A')
-                foreground_color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-            Button:
-                text: 'Unlock'
-                font_size: '18sp'
-                background_normal: ''
-                background_color: C('#339999') if app.theme == 'dark' else C('#66CCCC')
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                on_release: root.validate_pin(pin_input.text)
-                canvas.before:
-                    Color:
-                        rgba: self.background_color
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [10]
-            Button:
-                text: 'Change PIN'
-                font_size: '18sp'
-                background_normal: ''
-                background_color: C('#994433') if app.theme == 'dark' else C('#CC8866')
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                on_release: root.open_change_pin_popup()
-                canvas.before:
-                    Color:
-                        rgba: self.background_color
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [10]
-            Button:
-                text: 'Toggle Theme'
-                font_size: '18sp'
-                background_normal: ''
-                background_color: C('#555555') if app.theme == 'dark' else C('#AAAAAA')
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                on_release: app.switch_theme()
-                canvas.before:
-                    Color:
-                        rgba: self.background_color
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [10]
-            Button:
-                text: 'Test Crash'
-                font_size: '18sp'
-                background_normal: ''
-                background_color: C('#FF4444') if app.theme == 'dark' else C('#FF6666')
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                on_release: root.test_crash()
-                canvas.before:
-                    Color:
-                        rgba: self.background_color
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [10]
-
-<MainScreen>:
-    name: 'main'
-    FloatLayout:
-        canvas.before:
-            Color:
-                rgba: C('#1A2E4B') if app.theme == 'dark' else C('#E6F0FA')
-            Rectangle:
-                pos: self.pos
-                size: self.size
-            Color:
-                rgba: C('#2E4A7D') if app.theme == 'dark' else C('#A3CFFA')
-            Rectangle:
-                pos: self.x, self.y + self.height * 0.5
-                size: self.width, self.height * 0.5
-        BoxLayout:
-            orientation: 'vertical'
-            padding: 10
-            spacing: 10
-            BoxLayout:
-                size_hint_y: None
-                height: 50
-                spacing: 10
-                TextInput:
-                    id: search
-                    hint_text: 'Search bills...'
-                    multiline: False
-                    font_size: '16sp'
-                    background_color: C('#FFFFFF1A') if app.theme == 'dark' else C('#0000001A')
-                    foreground_color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_text: root.filter_bills(self.text)
-                Button:
-                    text: 'Clear'
-                    size_hint_x: 0.3
-                    background_normal: ''
-                    background_color: C('#994433') if app.theme == 'dark' else C('#CC8866')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.clear_search()
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-            BoxLayout:
-                size_hint_y: None
-                height: 50
-                spacing: 10
-                Button:
-                    text: 'Sort: Name'
-                    id: sort_name
-                    background_normal: ''
-                    background_color: C('#339999') if app.theme == 'dark' else C('#66CCCC')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.sort_bills('name')
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-                Button:
-                    text: 'Sort: Amount'
-                    id: sort_amount
-                    background_normal: ''
-                    background_color: C('#339999') if app.theme == 'dark' else C('#66CCCC')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.sort_bills('amount')
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-                Button:
-                    text: 'Sort: Due'
-                    id: sort_due
-                    background_normal: ''
-                    background_color: C('#339999') if app.theme == 'dark' else C('#66CCCC')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.sort_bills('due')
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-            RecycleView:
-                id: rv
-                viewclass: 'SelectableLabel'
-                RecycleBoxLayout:
-                    default_size: None, 50
-                    default_size_hint: 1, None
-                    size_hint_y: None
-                    height: self.minimum_height
-                    orientation: 'vertical'
-                    spacing: 5
-            Label:
-                id: remaining
-                text: f"Remaining to Pay: {app.currency_symbol}0.00"
-                font_size: '18sp'
-                color: C('#FFD700') if app.theme == 'dark' else C('#FF8C00')
-                size_hint_y: None
-                height: 40
-            BoxLayout:
-                size_hint_y: None
-                height: 60
-                spacing: 10
-                Button:
-                    text: 'Add Bill'
-                    font_size: '18sp'
-                    background_normal: ''
-                    background_color: C('#339999') if app.theme == 'dark' else C('#66CCCC')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.open_add_popup()
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-                Button:
-                    text: 'Summary'
-                    font_size: '18sp'
-                    background_normal: ''
-                    background_color: C('#994433') if app.theme == 'dark' else C('#CC8866')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.manager.current = 'summary'
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-                Button:
-                    text: 'Backup'
-                    font_size: '18sp'
-                    background_normal: ''
-                    background_color: C('#669933') if app.theme == 'dark' else C('#99CC66')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.backup_bills()
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-                Button:
-                    text: 'Import'
-                    font_size: '18sp'
-                    background_normal: ''
-                    background_color: C('#555555') if app.theme == 'dark' else C('#AAAAAA')
-                    color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                    on_release: root.import_bills()
-                    canvas.before:
-                        Color:
-                            rgba: self.background_color
-                        RoundedRectangle:
-                            pos: self.pos
-                            size: self.size
-                            radius: [10]
-
-<SummaryScreen>:
-    name: 'summary'
-    FloatLayout:
-        canvas.before:
-            Color:
-                rgba: C('#1A2E4B') if app.theme == 'dark' else C('#E6F0FA')
-            Rectangle:
-                pos: self.pos
-                size: self.size
-            Color:
-                rgba: C('#2E4A7D') if app.theme == 'dark' else C('#A3CFFA')
-            Rectangle:
-                pos: self.x, self.y + self.height * 0.5
-                size: self.width, self.height * 0.5
-        BoxLayout:
-            orientation: 'vertical'
-            padding: 10
-            spacing: 10
-            pos_hint: {'center_x': 0.5, 'center_y': 0.5}
-            size_hint: 0.9, 0.9
-            Label:
-                text: "Financial Summary"
-                font_size: '24sp'
-                bold: True
-                color: C('#FFD700') if app.theme == 'dark' else C('#FF8C00')
-            Label:
-                id: total_paid
-                text: f"Total Paid: {app.currency_symbol}0.00"
-                font_size: '18sp'
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-            Label:
-                id: total_remaining
-                text: f"Total Remaining: {app.currency_symbol}0.00"
-                font_size: '18sp'
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-            Label:
-                id: overdue
-                text: f"Overdue: {app.currency_symbol}0.00"
-                font_size: '18sp'
-                color: C('#FF6666') if app.theme == 'dark' else C('#CC3333')
-            BoxLayout:
-                id: chart_container
-                size_hint_y: None
-                height: 200
-            Button:
-                text: 'Back to Bills'
-                size_hint_y: None
-                height: 50
-                background_normal: ''
-                background_color: C('#339999') if app.theme == 'dark' else C('#66CCCC')
-                color: C('#FFFFFF') if app.theme == 'dark' else C('#000000')
-                on_release: root.manager.current = 'main'
-                canvas.before:
-                    Color:
-                        rgba: self.background_color
-                    RoundedRectangle:
-                        pos: self.pos
-                        size: self.size
-                        radius: [10]
-
-<SelectableLabel@ButtonBehavior+Label>:
-    background_color: (0.5, 0.5, 0.5, 1) if not hasattr(self, 'background_color') else self.background_color
-    color: (1, 1, 1, 1)
-    canvas.before:
-        Color:
-            rgba: self.background_color if self.background_color else (0.5, 0.5, 0.5, 1)
-        Rectangle:
-            pos: self.pos
-            size: self.size
-'''
-
-class LoginScreen(Screen):
-    failed_attempts = 0
-    lockout_until = 0
-    
-    def validate_pin(self, pin):
-        try:
-            import time
-            now = time.time()
-            if now < self.lockout_until:
-                remaining = int(self.lockout_until - now)
-                self.notify("Locked Out", f"Too many failed attempts. Try again in {remaining} seconds.")
-                return
-
-            if not pin.isdigit() or len(pin) != 4:
-                self.ids.pin_input.text = ''
-                self.ids.pin_input.hint_text = 'Enter a 4-digit PIN'
-                return
-
-            stored_pin = store.get('pin')['value'] if store.exists('pin') else hashlib.sha256(DEFAULT_PIN.encode()).hexdigest()
-            hashed_pin = hashlib.sha256(pin.encode()).hexdigest()
-
-            if hashed_pin == stored_pin:
-                self.failed_attempts = 0
-                if hashed_pin == hashlib.sha256(DEFAULT_PIN.encode()).hexdigest():
-                    self.notify("Notice", "You're using the default PIN. It's recommended to change it.")
-                    self.open_change_pin_popup()
-                else:
-                    self.manager.current = 'main'
-            else:
-                self.failed_attempts += 1
-                self.ids.pin_input.text = ''
-                self.ids.pin_input.hint_text = 'Incorrect PIN. Try again.'
-                if self.failed_attempts % 5 == 0:
-                    penalty_time = 60 * (self.failed_attempts // 5)
-                    self.lockout_until = now + penalty_time
-                    self.notify("Too Many Attempts", f"Locked for {penalty_time} seconds.")
-        except Exception as e:
-            self.notify("Error", f"Failed to validate PIN: {str(e)}")
-            log_crash(e, source="validate_pin")
-
-    def open_change_pin_popup(self):
-        try:
-            content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-            current_pin = TextInput(hint_text="Current PIN", password=True, multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            new_pin = TextInput(hint_text="New PIN (4 digits)", password=True, multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            confirm_pin = TextInput(hint_text="Confirm New PIN", password=True, multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            save_btn = Button(text="Save", size_hint_y=None, height=40, background_normal='', background_color=(0.2, 0.7, 0.7, 1))
-            error_label = Label(text="", color=(1, 0.4, 0.4, 1))
-
-            content.add_widget(current_pin)
-            content.add_widget(new_pin)
-            content.add_widget(confirm_pin)
-            content.add_widget(save_btn)
-            content.add_widget(error_label)
-
-            popup = Popup(title="Change PIN", content=content, size_hint=(0.8, 0.6))
-
-            def save_pin(*args):
-                try:
-                    stored_pin = store.get('pin')['value'] if store.exists('pin') else hashlib.sha256(DEFAULT_PIN.encode()).hexdigest()
-                    if hashlib.sha256(current_pin.text.encode()).hexdigest() != stored_pin:
-                        error_label.text = "Incorrect current PIN"
-                        return
-                    if not (new_pin.text.isdigit() and len(new_pin.text) == 4):
-                        error_label.text = "New PIN must be 4 digits"
-                        return
-                    if new_pin.text != confirm_pin.text:
-                        error_label.text = "PINs do not match"
-                        return
-                    store.put('pin', value=hashlib.sha256(new_pin.text.encode()).hexdigest())
-                    popup.dismiss()
-                    self.notify("PIN Changed", "Your PIN has been updated")
-                    self.manager.current = 'main'
-                except Exception as e:
-                    error_label.text = f"Error: {str(e)}"
-                    log_crash(e, source="save_pin")
-
-            save_btn.bind(on_release=save_pin)
-            popup.open()
-        except Exception as e:
-            self.notify("Error", f"Failed to open change PIN popup: {str(e)}")
-            log_crash(e, source="open_change_pin_popup")
-
-    def notify(self, title, message):
-        try:
-            notification.notify(title=title, message=message, timeout=5)
-        except Exception as e:
-            print(f"[ERROR] Notification failed: {str(e)}")
-            self.show_toast(message)
-
-    def show_toast(self, message):
-        try:
-            toast = Popup(
-                title='',
-                content=Label(text=message, color=(1, 1, 1, 1)),
-                size_hint=(0.8, 0.2),
-                pos_hint={'center_x': 0.5, 'top': 0.9},
-                auto_dismiss=True
-            )
-            toast.open()
-            Clock.schedule_once(lambda dt: toast.dismiss(), 2)
-        except Exception as e:
-            print(f"[ERROR] Toast failed: {str(e)}")
-            log_crash(e, source="show_toast")
-
-    def test_crash(self):
-        try:
-            dummy_dict = {}
-            print(dummy_dict['nonexistent_key'])
-        except Exception as e:
-            self.notify("Test Crash", f"Triggered test crash: {str(e)}")
-            log_crash(e, source="test_crash")
-
-class MainScreen(Screen):
-    bills = ListProperty([])
-    sort_key = 'due'
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.notification_callbacks = []
-
-    def on_enter(self):
-        try:
-            self.expanded_months = set()
-            today = datetime.datetime.now()
-            current_month = today.strftime('%B')
-            self.expanded_months.add(current_month)
-            if today.day >= 25:
-                next_month = (today.replace(day=28) + datetime.timedelta(days=4)).strftime('%B')
-                self.expanded_months.add(next_month)
-            self.load_bills()
-            self.update_view()
-            self.schedule_notifications()
-        except Exception as e:
-            self.notify("Error", f"Failed to initialize screen: {str(e)}")
-            log_crash(e, source="on_enter")
-
-    def load_bills(self):
-        try:
-            if store.exists('bills'):
-                valid_bills = []
-                for b in store.get('bills')['data']:
-                    if not all(k in b for k in ['name', 'amount', 'due', 'paid', 'category']):
-                        self.notify("Data Warning", f"Discarded invalid bill: {b.get('name', 'Unknown')}")
-                        continue
-                    if not isinstance(b['amount'], (int, float)) or not isinstance(b['due'], str):
-                        self.notify("Data Warning", f"Discarded invalid bill: {b.get('name', 'Unknown')}")
-                        continue
-                    if not re.match(r'^\d{2}/\d{2}/\d{4}$', b['due']):
-                        self.notify("Data Warning", f"Discarded invalid bill date: {b.get('name', 'Unknown')}")
-                        continue
-                    try:
-                        datetime.datetime.strptime(b['due'], '%d/%m/%Y')
-                        valid_bills.append(b)
-                    except ValueError:
-                        self.notify("Data Warning", f"Discarded invalid bill date: {b.get('name', 'Unknown')}")
-                self.bills = valid_bills
-            else:
-                self.bills = []
-        except Exception as e:
-            self.notify("Error", f"Failed to load bills: {str(e)}")
-            self.bills = []
-            store.delete('bills')
-            log_crash(e, source="load_bills")
-
-    def save_bills(self):
-        try:
-            store.put('bills', data=self.bills)
-        except Exception as e:
-            self.notify("Error", f"Failed to save bills: {str(e)}")
-            log_crash(e, source="save_bills")
-
-    def update_view(self):
-        try:
-            print(f"[DEBUG] Updating view with {len(self.bills)} bills, sort_key: {self.sort_key}")
-            self.ids.rv.data = []
-            search_text = self.ids.search.text.lower()
-            today = datetime.datetime.now()
-            valid_bills = []
-
-            for b in self.bills:
-                if not all(k in b for k in ['name', 'amount', 'due', 'paid', 'category']):
-                    self.notify("Data Warning", f"Skipping invalid bill: {b.get('name', 'Unknown')}")
-                    continue
-                try:
-                    datetime.datetime.strptime(b['due'], '%d/%m/%Y')
-                    valid_bills.append(b)
-                except ValueError:
-                    self.notify("Data Warning", f"Skipping bill with invalid date: {b.get('name', 'Unknown')}")
-                    continue
-
-            filtered_bills = [
-                b for b in valid_bills
-                if (search_text in b['name'].lower() or
-                    search_text in str(b['amount']).lower() or
-                    search_text in b['due'].lower() or
-                    search_text in b.get('frequency', '').lower() or
-                    search_text in b['category'].lower())
-            ]
-
-            sort_functions = {
-                'name': lambda x: x['name'].lower(),
-                'amount': lambda x: float(x['amount']),
-                'due': lambda x: datetime.datetime.strptime(x['due'], '%d/%m/%Y')
-            }
-            sorted_bills = sorted(filtered_bills, key=sort_functions[self.sort_key])
-
-            grouped = defaultdict(list)
-            for b in sorted_bills:
-                try:
-                    month = datetime.datetime.strptime(b['due'], '%d/%m/%Y').strftime('%B')
-                    grouped[month].append(b)
-                except ValueError:
-                    self.notify("Data Warning", f"Invalid due date for bill: {b['name']}")
-                    continue
-
-            for month, bills in grouped.items():
-                total = sum(float(b['amount']) for b in bills)
-                color = self.month_color(month)
-                is_expanded = month in self.expanded_months
-
-                self.ids.rv.data.append({
-                    'text': f"▶ {month.upper()} (Tap to Expand)" if not is_expanded else f"▼ {month.upper()} (Total: {App.get_running_app().currency_symbol}{total:.2f})",
-                    'on_release': partial(self.toggle_month, month),
-                    'background_color': color,
-                    'color': (1, 1, 1, 1),
-                    'font_size': '18sp'
-                })
-
-                if is_expanded:
-                    for b in bills:
-                        due_date = datetime.datetime.strptime(b['due'], '%d/%m/%Y')
-                        is_overdue = due_date < today and not b['paid']
-                        icon = BILL_CATEGORIES.get(b['category'], '💸')
-                        self.ids.rv.data.append({
-                            'text': f"{icon} {b['name']}: {App.get_running_app().currency_symbol}{b['amount']} (Due: {b['due']}){' ✓' if b['paid'] else ' ⚠' if is_overdue else ''}",
-                            'on_release': partial(self.edit_bill, b),
-                            'background_color': (0.3, 0.7, 0.3, 1) if b['paid'] else (1, 0.4, 0.4, 1) if is_overdue else (1, 1, 1, 1),
-                            'color': (1, 1, 1, 1),
-                            'font_size': '16sp',
-                            'on_press': lambda *args, b=b: self.animate_button(args[0] if args else None)
-                        })
-
-            if not self.ids.rv.data:
-                self.ids.rv.data = [{
-                    'text': 'No bills found. Tap "Add Bill" to start.',
-                    'on_release': lambda x: None,
-                    'background_color': (0.5, 0.5, 0.5, 1),
-                    'color': (1, 1, 1, 1),
-                    'font_size': '16sp'
-                }]
-
-            remaining = sum(float(b['amount']) for b in valid_bills if not b['paid'])
-            self.ids.remaining.text = f"Remaining to Pay: {App.get_running_app().currency_symbol}{remaining:.2f}"
-
-            self.ids.rv.data = self.ids.rv.data
-            self.ids.rv.refresh_from_data()
-            print(f"[DEBUG] RV data set with {len(self.ids.rv.data)} items")
-        except Exception as e:
-            self.notify("Error", f"Failed to update view: {str(e)}")
-            log_crash(e, source="update_view")
-
-    def animate_button(self, instance):
-        try:
-            if instance and hasattr(instance, 'background_color'):
-                anim = Animation(background_color=(0.5, 0.8, 0.8, 1), duration=0.1) + Animation(background_color=instance.background_color, duration=0.1)
-                anim.start(instance)
-        except Exception as e:
-            self.notify("Error", f"Failed to animate button: {str(e)}")
-            log_crash(e, source="animate_button")
-
-    def month_color(self, month):
-        colors = {
-            'January': (0.4, 0.6, 0.9, 1), 'February': (0.8, 0.4, 0.7, 1),
-            'March': (0.4, 0.9, 0.5, 1), 'April': (0.9, 0.6, 0.4, 1),
-            'May': (0.9, 0.9, 0.4, 1), 'June': (0.4, 0.9, 0.9, 1),
-            'July': (0.9, 0.4, 0.4, 1), 'August': (0.4, 0.9, 0.4, 1),
-            'September': (0.6, 0.6, 0.9, 1), 'October': (0.9, 0.6, 0.9, 1),
-            'November': (0.6, 0.9, 0.9, 1), 'December': (0.9, 0.6, 0.6, 1)
-        }
-        return colors.get(month, (0.5, 0.5, 0.5, 1))
-
-    def toggle_month(self, month):
-        try:
-            print(f"[DEBUG] Toggling month: {month}, Current expanded: {self.expanded_months}")
-            if month in self.expanded_months:
-                self.expanded_months.remove(month)
-            else:
-                self.expanded_months.add(month)
-            print(f"[DEBUG] After toggle, expanded: {self.expanded_months}")
-            self.update_view()
-        except Exception as e:
-            self.notify("Error", f"Failed to toggle month: {str(e)}")
-            log_crash(e, source="toggle_month")
-
-    def clear_search(self):
-        try:
-            self.ids.search.text = ''
-            self.update_view()
-        except Exception as e:
-            self.notify("Error", f"Failed to clear search: {str(e)}")
-            log_crash(e, source="clear_search")
-
-    def sort_bills(self, key):
-        try:
-            self.sort_key = key
-            self.update_view()
-            for btn in [self.ids.sort_name, self.ids.sort_amount, self.ids.sort_due]:
-                btn.background_color = (0.2, 0.7, 0.7, 1) if btn is self.ids[f'sort_{key}'] else (0.5, 0.5, 0.5, 1)
-        except Exception as e:
-            self.notify("Error", f"Failed to sort bills: {str(e)}")
-            log_crash(e, source="sort_bills")
-
-    def open_add_popup(self):
-        try:
-            self.open_bill_popup()
-        except Exception as e:
-            self.notify("Error", f"Failed to open add popup: {str(e)}")
-            log_crash(e, source="open_add_popup")
-
-    def edit_bill(self, bill):
-        try:
-            self.open_bill_popup(bill)
-        except Exception as e:
-            self.notify("Error", f"Failed to open edit popup: {str(e)}")
-            log_crash(e, source="edit_bill")
-
-    def open_bill_popup(self, bill=None):
-        try:
-            is_edit = bill is not None
-            content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-            name_input = TextInput(text=bill['name'] if is_edit else '', hint_text="Bill Name", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            amount_input = TextInput(text=str(bill['amount']) if is_edit else '', hint_text="Amount", input_filter='float', multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            due_input = TextInput(text=bill['due'] if is_edit else '', hint_text="Due Date (DD/MM/YYYY)", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
-            category_input = Spinner(
-                text=bill.get('category', 'Select Category') if is_edit else 'Select Category',
-                values=list(BILL_CATEGORIES.keys()),
-                size_hint_y=None,
-                height=40,
-                background_color=(0.2, 0.7, 0.7, 1)
-            )
-            freq_input = Spinner(
-                text=bill.get('frequency', 'Select Frequency') if is_edit else 'Select Frequency',
-                values=('Weekly', '4 Weekly', 'Monthly', 'Custom'),
-                size_hint_y=None,
-                height=40,
-                background_color=(0.2, 0.7, 0.7, 1)
-            )
-            error_label = Label(text="", color=(1, 0.4, 0.4, 1))
-
-            def autoformat_date(instance, value):
-                try:
-                    v = ''.join(c for c in value if c.isdigit())[:8]
-                    new_text = ''
-                    if v:
-                        new_text += v[:2]
-                        if len(v) > 2:
-                            new_text += '/' + v[2:4]
-                        if len(v) > 4:
-                            new_text += '/' + v[4:]
-                    instance.text = new_text
-                    if len(new_text) == 10:
-                        try:
-                            datetime.datetime.strptime(new_text, '%d/%m/%Y')
-                            error_label.text = ""
-                        except ValueError:
-                            error_label.text = "Invalid date"
-                except Exception as e:
-                    error_label.text = f"Error: {str(e)}"
-                    log_crash(e, source="autoformat_date")
+    def on_export_done(self, paths, exported, error):
+        self.exporter = None
+        if isinstance(error, PermissionError):
+            self.notify("Export Failed", "Permission denied. Please grant storage access.")
+        elif error is not None:
+            self.notify("Export Failed", f"Error: {str(error)}")
+        elif not paths:
+            self.notify("Export Cancelled", "No files were changed")
+        elif len(paths) == 1:
+            self.notify("Bills Exported", f"Saved {exported} bills to {paths[0]}")
+        else:
+            self.notify("Bills Exported", f"Saved {exported} bills to {len(paths)} files in {os.path.dirname(paths[0])}")
 
-            due_input.bind(text=autoformat_date)
+    def find_import_files(self):
+        if platform == 'android':
+            try:
+                from android.permissions import request_permissions, Permission, check_permission
+                if not check_permission(Permission.READ_EXTERNAL_STORAGE):
+                    request_permissions([Permission.WRITE_EXTERNAL_STORAGE, Permission.READ_EXTERNAL_STORAGE])
+            except Exception as e:
+                self.notify("Permission Error", f"Failed to request permissions: {str(e)}")
+                log_crash(e, source="import_bills_permissions")
+                return []
+        # Every CSV and TXT file in the folder, in name order, except our own exports
+        import_dir = self.get_export_dir()
+        try:
+            names = sorted(os.listdir(import_dir))
+        except OSError:
+            names = []
+        import_paths = [
+            os.path.join(import_dir, name) for name in names
+            if name.lower().endswith(IMPORT_EXTENSIONS) and not name.startswith(EXPORT_FILE_PREFIX)
+            and os.path.isfile(os.path.join(import_dir, name))
+        ]
+        if not import_paths:
+            self.notify("Import Failed", f"No valid import files found in {import_dir}")
+        return import_paths
+
+    def preview_import(self):
+        try:
+            if self.importer is not None and self.importer.running:
+                self.notify("Import In Progress", "Wait for the current import to finish")
+                return
+            if self.restore_task is not None and self.restore_task.running:
+                self.notify("Restore In Progress", "Wait for the restore to finish")
+                return
+            import_paths = self.find_import_files()
+            if not import_paths:
+                return
+            self.importer = ImportPreview(import_paths, self.duplicates.snapshot(), self.duplicates.dated_snapshot(),
+                                          self.notify, self.on_preview_done)
+            self.importer.start()
+            self.show_toast("Checking import files...")
+        except Exception as e:
+            self.notify("Error", f"Failed to preview import: {str(e)}")
+            log_crash(e, source="preview_import")
 
-            save_btn = Button(text="Save", size_hint_y=None, height=40, background_normal='', background_color=(0.2, 0.7, 0.7, 1))
-            complete_btn = Button(
-                text=("Mark as Unpaid" if bill and bill.get('paid') else "Mark as Paid"),
-                size_hint_y=None, height=40, background_normal='', background_color=(0.3, 0.7, 0.3, 1)
-            )
-            if is_edit:
-                del_btn = Button(text="Delete", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.4, 0.4, 1))
+    def on_preview_done(self, imported_files, preview):
+        self.importer = None
+        if not imported_files:
+            self.notify("Import Failed", "No valid import files found")
+            return
+        self.show_import_preview(preview)
 
-            content.add_widget(name_input)
-            content.add_widget(amount_input)
-            content.add_widget(due_input)
-            content.add_widget(category_input)
-            content.add_widget(freq_input)
-            content.add_widget(error_label)
-            content.add_widget(save_btn)
-            content.add_widget(complete_btn)
-            if is_edit:
-                content.add_widget(del_btn)
+    def show_import_preview(self, preview):
+        try:
+            counts = preview.counts
+            rows = preview.rows()
+            pages = max(1, -(-len(rows) // IMPORT_PREVIEW_PAGE_ROWS))
+            page = [0]
 
-            popup = Popup(title="Edit Bill" if is_edit else "Add Bill", content=content, size_hint=(0.9, 0.9))
-            save_btn.bind(on_release=lambda x: self.save_bill(name_input.text, amount_input.text, due_input.text, category_input.text, freq_input.text, popup, error_label, bill))
-            complete_btn.bind(on_release=lambda x: self.mark_bill_paid(bill, popup))
-            if is_edit:
-                del_btn.bind(on_release=lambda x: self.confirm_delete(bill, popup))
+            content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+            content.add_widget(Label(
+                text=f"New: {counts['new']}   Duplicates: {counts['duplicate']}   "
+                     f"Conflicts: {counts['conflict']}   Invalid: {counts['invalid']}",
+                size_hint_y=None, height=30, color=(1, 1, 1, 1)))
+            rows_label = Label(text="", halign='left', valign='top', color=(1, 1, 1, 1))
+            rows_label.bind(size=lambda label, size: setattr(label, 'text_size', size))
+            content.add_widget(rows_label)
+            pager = BoxLayout(size_hint_y=None, height=40, spacing=10)
+            prev_btn = Button(text="Prev", background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            page_label = Label(text="", color=(1, 1, 1, 1))
+            next_btn = Button(text="Next", background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            pager.add_widget(prev_btn)
+            pager.add_widget(page_label)
+            pager.add_widget(next_btn)
+            content.add_widget(pager)
+            actions = BoxLayout(size_hint_y=None, height=40, spacing=10)
+            skip_btn = Button(text="Import", background_normal='', background_color=(0.2, 0.7, 0.7, 1))
+            merge_btn = Button(text="Merge", background_normal='', background_color=(0.2, 0.6, 0.9, 1))
+            replace_btn = Button(text="Replace", background_normal='', background_color=(1, 0.6, 0.2, 1))
+            cancel_btn = Button(text="Cancel", background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            for btn in (skip_btn, merge_btn, replace_btn, cancel_btn):
+                actions.add_widget(btn)
+            content.add_widget(actions)
+
+            popup = Popup(title="Import Preview", content=content, size_hint=(0.95, 0.8))
+
+            def show_page(delta):
+                page[0] = min(max(page[0] + delta, 0), pages - 1)
+                start = page[0] * IMPORT_PREVIEW_PAGE_ROWS
+                rows_label.text = '\n'.join(f"[{kind}] {text}" for kind, text in rows[start:start + IMPORT_PREVIEW_PAGE_ROWS]) or "Nothing to import"
+                page_label.text = f"Page {page[0] + 1} of {pages}"
+
+            def run_import(policy):
+                popup.dismiss()
+                self.import_bills(policy)
+
+            prev_btn.bind(on_release=lambda x: show_page(-1))
+            next_btn.bind(on_release=lambda x: show_page(1))
+            skip_btn.bind(on_release=lambda x: run_import('skip'))
+            merge_btn.bind(on_release=lambda x: run_import('merge'))
+            replace_btn.bind(on_release=lambda x: run_import('replace'))
+            cancel_btn.bind(on_release=lambda x: popup.dismiss())
+            show_page(0)
             popup.open()
         except Exception as e:
-            self.notify("Error", f"Failed to open bill popup: {str(e)}")
-            log_crash(e, source="open_bill_popup")
+            self.notify("Error", f"Failed to show import preview: {str(e)}")
+            log_crash(e, source="show_import_preview")
 
-    def save_bill(self, name, amount, due, category, frequency, popup, error_label, bill=None):
+    def import_bills(self, policy):
+        # policy is the preview button pressed, and decides what happens to rows
+        # that match a bill already held: 'skip' them, 'merge' them into it, or
+        # 'replace' its values
         try:
-            print(f"[DEBUG] Saving bill: {name}, amount: {amount}, due: {due}")
-            if not name.strip():
-                error_label.text = "Bill name cannot be empty"
-                return
-            try:
-                amount_float = float(amount)
-                if amount_float <= 0:
-                    raise ValueError
-            except ValueError:
-                error_label.text = "Amount must be a positive number"
-                return
-            if not re.match(r'^\d{2}/\d{2}/\d{4}$', due):
-                error_label.text = "Invalid date format (use DD/MM/YYYY)"
-                return
-            try:
-                due_date = datetime.datetime.strptime(due, '%d/%m/%Y')
-                if due_date.year < datetime.datetime.now().year - 1 or due_date.year > datetime.datetime.now().year + 10:
-                    raise ValueError
-            except ValueError:
-                error_label.text = "Invalid or unrealistic date"
+            if policy not in IMPORT_DUPLICATE_POLICIES:
+                raise ValueError(f"unknown duplicate policy {policy!r}")
+            if self.importer is not None and self.importer.running:
+                self.notify("Import In Progress", "Wait for the current import to finish")
                 return
-            if category == 'Select Category':
-                error_label.text = "Please select a category"
+            if self.restore_task is not None and self.restore_task.running:
+                self.notify("Restore In Progress", "Wait for the restore to finish")
                 return
-            if frequency == 'Select Frequency':
-                error_label.text = "Please select a frequency"
+            import_paths = self.find_import_files()
+            if not import_paths:
                 return
-
-            if bill is None:
-                if frequency == 'Weekly':
-                    due_date += datetime.timedelta(weeks=1)
-                elif frequency == '4 Weekly':
-                    due_date += datetime.timedelta(weeks=4)
-                elif frequency == 'Monthly':
-                    month = due_date.month + 1 if due_date.month < 12 else 1
-                    year = due_date.year + 1 if month == 1 else due_date.year
-                    try:
-                        due_date = due_date.replace(month=month, year=year)
-                    except ValueError:
-                        due_date = due_date.replace(day=28, month=month, year=year)
-
-            while due_date.weekday() >= 5 or due_date.strftime('%d/%m') in BANK_HOLIDAYS:
-                due_date += datetime.timedelta(days=1)
-
-            due_formatted = due_date.strftime('%d/%m/%Y')
-
-            if bill:
-                bill['name'] = name
-                bill['amount'] = amount_float
-                bill['due'] = due_formatted
-                bill['category'] = category
-                bill['frequency'] = frequency
-            else:
-                self.bills.append({
-                    'name': name,
-                    'amount': amount_float,
-                    'paid': False,
-                    'due': due_formatted,
-                    'category': category,
-                    'frequency': frequency
-                })
-
-            self.save_bills()
-            self.update_view()
-            self.schedule_notifications()
-            popup.dismiss()
-            self.notify("Bill Saved", f"{'Updated' if bill else 'Added'} {name}")
+            self.importer = BillImporter(import_paths, self.duplicates.snapshot(), policy,
+                                         self.on_import_chunk, self.notify, self.on_import_done)
+            self.importer.start()
         except Exception as e:
-            error_label.text = f"Error: {str(e)}"
-            self.notify("Error", f"Failed to save bill: {str(e)}")
-            log_crash(e, source="save_bill")
+            self.notify("Error", f"Failed to import bills: {str(e)}")
+            log_crash(e, source="import_bills")
 
-    def mark_bill_paid(self, bill, popup):
+    def on_import_chunk(self, importer, bills, matched, progress):
         try:
-            if bill:
-                bill['paid'] = not bill['paid']
-                if bill['paid'] and bill['frequency'] != 'Custom':
-                    try:
-                        due_date = datetime.datetime.strptime(bill['due'], '%d/%m/%Y')
-                        if bill['frequency'] == 'Weekly':
-                            due_date += datetime.timedelta(weeks=1)
-                        elif bill['frequency'] == '4 Weekly':
-                            due_date += datetime.timedelta(weeks=4)
-                        elif bill['frequency'] == 'Monthly':
-                            month = due_date.month + 1 if due_date.month < 12 else 1
-                            year = due_date.year + 1 if month == 1 else due_date.year
-                            try:
-                                due_date = due_date.replace(month=month, year=year)
-                            except ValueError:
-                                due_date = due_date.replace(day=28, month=month, year=year)
-                        while due_date.weekday() >= 5 or due_date.strftime('%d/%m') in BANK_HOLIDAYS:
-                            due_date += datetime.timedelta(days=1)
-                        new_bill = bill.copy()
-                        new_bill['due'] = due_date.strftime('%d/%m/%Y')
-                        new_bill['paid'] = False
-                        self.bills.append(new_bill)
-                        self.notify("Bill Added", f"Next {bill['name']} due on {new_bill['due']}")
-                    except Exception as e:
-                        self.notify("Error", f"Failed to create next bill: {str(e)}")
-                        log_crash(e, source="mark_bill_paid_next")
-                self.save_bills()
-                self.update_view()
-                self.schedule_notifications()
-                popup.dismiss()
-                self.notify("Bill Updated", f"{bill['name']} marked as {'paid' if bill['paid'] else 'unpaid'}")
+            # A reload while the import runs may already have picked these up
+            self.ledger.add_many(b for b in bills if self.ledger.get(b.id) is None)
+            changed = []
+            for bill_id, incoming in matched:
+                existing = self.ledger.get(bill_id)
+                if existing is None:
+                    importer.stats['skipped'] += 1
+                    continue
+                importer.stats['merged' if importer.policy == 'merge' else 'replaced'] += 1
+                changes = resolve_duplicate(existing, incoming, importer.policy)
+                if changes:
+                    self.ledger.update(existing, **changes)
+                    changed.append(existing)
+            if changed:
+                self.save_bills(changed)
+            self.import_refresh()
+            self.show_toast(f"Importing bills... {progress:.0%}")
         except Exception as e:
-            self.notify("Error", f"Failed to mark bill paid: {str(e)}")
-            log_crash(e, source="mark_bill_paid")
-
-    def confirm_delete(self, bill, popup):
+            self.notify("Error", f"Failed to import bills: {str(e)}")
+            log_crash(e, source="on_import_chunk")
+
+    def on_import_done(self, imported_files, stats, rejects):
+        self.importer = None
+        self.import_refresh.cancel()
+        self.update_view()
+        for reason, (count, name) in rejects.items():
+            message = f"Skipped invalid bill: {reason.capitalize()} in {name}" if count == 1 else f"{count} rows skipped: {reason}"
+            self.notify("Import Warning", message)
+        if not imported_files:
+            self.notify("Import Failed", "No valid import files found")
+            return
+        summary = [f"{stats['added']} new"]
+        for label in ('merged', 'replaced', 'skipped', 'invalid'):
+            if stats[label]:
+                summary.append(f"{stats[label]} {'duplicates skipped' if label == 'skipped' else label}")
+        self.notify("Bills Imported", ', '.join(summary))
+
+    def backup_store(self):
+        return BackupStore(os.path.join(self.get_export_dir(), BACKUP_DIR_NAME))
+
+    def restore_sources(self):
+        # Spinner label -> (records factory, expected count), newest first:
+        # incremental points, then full backups written by older builds
+        sources = {}
+        backups = self.backup_store()
+        for point in reversed(backups.points()):
+            try:
+                manifest = backups.manifest(point)
+                created = datetime.datetime.strptime(point, BackupStore.STAMP_FORMAT)
+            except (OSError, ValueError) as e:
+                log_crash(e, source="restore_sources")
+                continue
+            label = f"{created.strftime('%d/%m/%Y %H:%M:%S')} ({manifest['count']} bills)"
+            sources[label] = (partial(backups.records, point), manifest['count'])
+        export_dir = self.get_export_dir()
+        legacy = sorted((f for f in os.listdir(export_dir)
+                         if f.startswith(BACKUP_LEGACY_PREFIX) and f.endswith(('.json', '.json.gz'))),
+                        reverse=True) if os.path.isdir(export_dir) else []
+        for name in legacy:
+            sources[f"{name} (full)"] = (partial(read_legacy_backup, os.path.join(export_dir, name)), None)
+        return sources
+
+    def open_backup_popup(self):
         try:
             content = BoxLayout(orientation='vertical', spacing=10, padding=10)
-            content.add_widget(Label(text=f"Delete '{bill['name']}'? This cannot be undone."))
-            confirm_btn = Button(text="Delete", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.4, 0.4, 1))
-            cancel_btn = Button(text="Cancel", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
-            content.add_widget(confirm_btn)
-            content.add_widget(cancel_btn)
+            popup = Popup(title="Backup & Restore", content=content, size_hint=(0.9, 0.6))
+            close_btn = Button(text="Close", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            close_btn.bind(on_release=lambda x: popup.dismiss())
+            if self.restore_task is not None and self.restore_task.running:
+                content.add_widget(Label(text="A restore is running."))
+                stop_btn = Button(text="Cancel Restore", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.4, 0.4, 1))
+                stop_btn.bind(on_release=lambda x: (self.restore_task.cancel(), popup.dismiss()))
+                content.add_widget(stop_btn)
+                content.add_widget(close_btn)
+                popup.open()
+                return
 
-            confirm_popup = Popup(title="Confirm Delete", content=content, size_hint=(0.8, 0.4))
-            confirm_btn.bind(on_release=lambda x: self.delete_bill(bill, popup, confirm_popup))
-            cancel_btn.bind(on_release=lambda x: confirm_popup.dismiss())
-            confirm_popup.open()
+            backup_btn = Button(text="Back Up Now", size_hint_y=None, height=40, background_normal='', background_color=(0.4, 0.6, 0.2, 1))
+            backup_btn.bind(on_release=lambda x: (popup.dismiss(), self.backup_bills()))
+            content.add_widget(backup_btn)
+            sources = self.restore_sources()
+            if sources:
+                source_spinner = Spinner(text=next(iter(sources)), values=list(sources),
+                                         size_hint_y=None, height=40, background_color=(0.2, 0.6, 0.6, 1))
+                restore_btn = Button(text="Restore", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.6, 0.2, 1))
+                content.add_widget(source_spinner)
+                content.add_widget(restore_btn)
+
+                def confirm_restore(*args):
+                    confirm_content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+                    confirm_popup = Popup(title="Confirm Restore", content=confirm_content, size_hint=(0.8, 0.4))
+                    confirm_content.add_widget(Label(text=f"Replace all bills with the backup from\n{source_spinner.text}?"))
+                    yes_btn = Button(text="Restore", size_hint_y=None, height=40, background_normal='', background_color=(1, 0.6, 0.2, 1))
+                    no_btn = Button(text="Cancel", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+                    confirm_content.add_widget(yes_btn)
+                    confirm_content.add_widget(no_btn)
+                    yes_btn.bind(on_release=lambda x: (confirm_popup.dismiss(), popup.dismiss(),
+                                                       self.restore_bills(*sources[source_spinner.text])))
+                    no_btn.bind(on_release=lambda x: confirm_popup.dismiss())
+                    confirm_popup.open()
+
+                restore_btn.bind(on_release=confirm_restore)
+            else:
+                content.add_widget(Label(text="No backups to restore yet."))
+            content.add_widget(close_btn)
+            popup.open()
         except Exception as e:
-            self.notify("Error", f"Failed to open delete confirmation: {str(e)}")
-            log_crash(e, source="confirm_delete")
+            self.notify("Error", f"Failed to open backups: {str(e)}")
+            log_crash(e, source="open_backup_popup")
 
-    def delete_bill(self, bill, popup, confirm_popup):
+    def restore_bills(self, records, total=None):
         try:
-            self.bills.remove(bill)
-            self.save_bills()
-            self.update_view()
-            self.schedule_notifications()
-            popup.dismiss()
-            confirm_popup.dismiss()
-            self.notify("Bill Deleted", f"{bill['name']} has been deleted")
+            if self.restore_task is not None and self.restore_task.running:
+                self.notify("Restore In Progress", "Wait for the current restore to finish")
+                return
+            if self.importer is not None and self.importer.running:
+                self.notify("Import In Progress", "Wait for the import to finish before restoring")
+                return
+            self.restore_task = RestoreTask(records, total, self.on_restore_progress, self.on_restore_done)
+            self.restore_task.start()
         except Exception as e:
-            self.notify("Error", f"Failed to delete bill: {str(e)}")
-            log_crash(e, source="delete_bill")
-
-    def filter_bills(self, text):
-        try:
+            self.notify("Restore Failed", f"Error: {str(e)}")
+            log_crash(e, source="restore_bills")
+
+    def on_restore_progress(self, restored, total):
+        self.show_toast(f"Restoring bills... {restored}/{total}" if total else f"Restoring bills... {restored}")
+
+    def on_restore_done(self, stats, error):
+        self.restore_task = None
+        if error is not None:
+            self.notify("Restore Failed", f"Error: {str(error)}. Your bills were not changed.")
+        elif stats is None:
+            self.notify("Restore Cancelled", "Your bills were not changed")
+        else:
+            self.load_bills()
             self.update_view()
-        except Exception as e:
-            self.notify("Error", f"Failed to filter bills: {str(e)}")
-            log_crash(e, source="filter_bills")
+            self.catch_up_reminders()
+            invalid = f", {stats['invalid']} invalid records skipped" if stats['invalid'] else ""
+            self.notify("Bills Restored", f"{stats['restored']} bills restored{invalid}")
 
-    def get_export_dir(self):
+    def backup_bills(self):
         try:
-            if platform == 'android':
-                try:
-                    from jnius import autoclass
-                    Environment = autoclass('android.os.Environment')
-                    return os.path.join(Environment.getExternalStoragePublicDirectory(
-                        Environment.DIRECTORY_DOCUMENTS).getPath(), 'BillsManager_Exports')
-                except Exception:
-                    return os.path.join(os.path.expanduser('~'), 'BillsManager_Exports')
-            else:
-                return os.path.join(os.path.expanduser('~'), 'Documents', 'BillsManager_Exports')
+            if self.backup_task is not None and self.backup_task.running:
+                self.notify("Backup In Progress", "Wait for the current backup to finish")
+                return
+            self.backup_task = BackupTask(self.backup_store(), self.on_backup_done)
+            self.backup_task.start()
         except Exception as e:
-            self.notify("Error", f"Failed to get export directory: {str(e)}")
-            log_crash(e, source="get_export_dir")
-            return os.path.join(os.path.expanduser('~'), 'Documents', 'BillsManager_Exports')
+            self.notify("Backup Failed", f"Error: {str(e)}")
+            log_crash(e, source="backup_bills")
 
-    def export_bills(self):
-        try:
-            if platform == 'android':
-                try:
-                    from android.permissions import request_permissions, Permission, check_permission
-                    if not check_permission(Permission.WRITE_EXTERNAL_STORAGE):
-                        request_permissions([Permission.WRITE_EXTERNAL_STORAGE, Permission.READ_EXTERNAL_STORAGE])
-                except Exception as e:
-                    self.notify("Permission Error", f"Failed to request permissions: {str(e)}")
-                    log_crash(e, source="export_bills_permissions")
-                    return
-            export_dir = self.get_export_dir()
-            os.makedirs(export_dir, exist_ok=True)
-            export_path = os.path.join(export_dir, "bills_export.csv")
-            with open(export_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Name", "Amount", "Paid", "Due", "Category", "Frequency"])
-                for b in self.bills:
-                    writer.writerow([b['name'], b['amount'], b['paid'], b['due'], b['category'], b.get('frequency', '')])
-            self.notify("Bills Exported", f"Saved to {export_path}")
-        except PermissionError:
-            self.notify("Export Failed", "Permission denied. Please grant storage access.")
-        except Exception as e:
-            self.notify("Export Failed", f"Error: {str(e)}")
-            log_crash(e, source="export_bills")
+    def on_backup_done(self, result, error):
+        self.backup_task = None
+        if error is not None:
+            self.notify("Backup Failed", f"Error: {str(error)}")
+        elif result is not None:
+            point, count, months, written, removed = result
+            pruned = f", {removed} old points pruned" if removed else ""
+            self.notify("Backup Created", f"{count} bills, {written} of {months} months changed{pruned}")
 
-    def import_bills(self):
+    def remind(self, reminders):
         try:
-            if platform == 'android':
-                try:
-                    from android.permissions import request_permissions, Permission, check_permission
-                    if not check_permission(Permission.READ_EXTERNAL_STORAGE):
-                        request_permissions([Permission.WRITE_EXTERNAL_STORAGE, Permission.READ_EXTERNAL_STORAGE])
-                except Exception as e:
-                    self.notify("Permission Error", f"Failed to request permissions: {str(e)}")
-                    log_crash(e, source="import_bills_permissions")
-                    return
-            import_dir = self.get_export_dir()
-            import_paths = [
-                os.path.join(import_dir, "bills_import.csv"),
-                os.path.join(import_dir, "bills_import.txt")
-            ]
-            imported = False
-            for import_path in import_paths:
-                if not os.path.exists(import_path):
-                    continue
-                try:
-                    with open(import_path, "r", newline="", encoding="utf-8") as f:
-                        first_line = f.readline().strip()
-                        f.seek(0)
-                        required_fields = ["Name", "Amount", "Paid", "Due", "Category"]
-                        is_csv = import_path.endswith(".csv")
-                        if is_csv:
-                            reader = csv.DictReader(f)
-                            if not all(field in reader.fieldnames for field in required_fields):
-                                self.notify("Import Warning", f"Invalid headers in {import_path}")
-                                continue
-                        else:
-                            if not all(field in first_line.split(",") for field in required_fields):
-                                self.notify("Import Warning", f"Invalid headers in {import_path}")
-                                continue
-                            next(f)
-                            reader = [dict(zip(first_line.split(","), line.strip().split(","))) for line in f if line.strip()]
-                        for row in reader:
-                            if not all(field in row for field in required_fields):
-                                self.notify("Import Warning", f"Skipped invalid bill: Missing fields in {row.get('Name', 'Unknown')}")
-                                continue
-                            if not re.match(r'^\d{2}/\d{2}/\d{4}$', row['Due']):
-                                self.notify("Import Warning", f"Skipped invalid bill: Invalid date in {row.get('Name', 'Unknown')}")
-                                continue
-                            try:
-                                amount = float(row['Amount'])
-                                if amount <= 0:
-                                    raise ValueError
-                                datetime.datetime.strptime(row['Due'], '%d/%m/%Y')
-                                self.bills.append({
-                                    'name': row['Name'],
-                                    'amount': amount,
-                                    'paid': row['Paid'].lower() == 'true',
-                                    'due': row['Due'],
-                                    'category': row['Category'] if row['Category'] in BILL_CATEGORIES else 'Other',
-                                    'frequency': row.get('Frequency', 'Custom')
-                                })
-                            except (ValueError, KeyError):
-                                self.notify("Import Warning", f"Skipped invalid bill: {row.get('Name', 'Unknown')}")
-                                continue
-                        self.notify("Bills Imported", f"Imported from {import_path}")
-                        imported = True
-                except FileNotFoundError:
-                    self.notify("Import Failed", f"No import file found at {import_path}")
-                except Exception as e:
-                    self.notify("Import Failed", f"Error reading {import_path}: {str(e)}")
-                    log_crash(e, source="import_bills_read")
-            if not imported:
-                self.notify("Import Failed", f"No valid import files found in {import_dir}")
-            if imported:
-                self.save_bills()
-                self.update_view()
-                self.schedule_notifications()
+            bills = [self.ledger.get(bill_id) for bill_id, kind in reminders]
+            self.send_reminders([b for b in bills if b is not None])
+            storage.put_setting('reminder_checkpoint', time.time())
         except Exception as e:
-            self.notify("Error", f"Failed to import bills: {str(e)}")
-            log_crash(e, source="import_bills")
+            self.notify("Error", f"Failed to send reminder: {str(e)}")
+            log_crash(e, source="remind")
 
-    def backup_bills(self):
+    def catch_up_reminders(self):
+        # Reminders only fire while the process runs, so on start and resume
+        # every reminder that fell due since the saved checkpoint is delivered
+        # as one digest, found with a range query on the due-date index.
         try:
-            export_dir = self.get_export_dir()
-            os.makedirs(export_dir, exist_ok=True)
-            backup_path = os.path.join(export_dir, f"bills_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            store.export(backup_path)
-            self.notify("Backup Created", f"Saved to {backup_path}")
+            if not self.loaded:
+                return
+            now = time.time()
+            checkpoint = storage.get_setting('reminder_checkpoint', now - REMINDER_LEAD_SECONDS)
+            # Reminder times are midnights shifted back by the lead, so shift the
+            # window forward by the lead and map it onto due days
+            first_due = datetime.date.fromtimestamp(checkpoint + REMINDER_LEAD_SECONDS).toordinal() + 1
+            last_due = datetime.date.fromtimestamp(now + REMINDER_LEAD_SECONDS).toordinal()
+            missed = []
+            for bill_id in self.sort_indexes['due'].range(first_due, last_due):
+                bill = self.ledger.get(bill_id)
+                if not bill.paid and checkpoint < reminder_time(bill) <= now:
+                    missed.append(bill)
+            self.reminders.discard_until(now)
+            storage.put_setting('reminder_checkpoint', now)
+            self.send_reminders(missed)
         except Exception as e:
-            self.notify("Backup Failed", f"Error: {str(e)}")
-            log_crash(e, source="backup_bills")
-
-    def schedule_notifications(self):
+            self.notify("Error", f"Failed to check missed reminders: {str(e)}")
+            log_crash(e, source="catch_up_reminders")
+
+    def send_reminders(self, bills):
+        if len(bills) == 1:
+            self.notify("Bill Due Soon", f"{bills[0].name} due on {bills[0].due}")
+        elif bills:
+            names = ', '.join(f"{b.name} ({b.due})" for b in bills[:REMINDER_DIGEST_NAMES])
+            more = len(bills) - REMINDER_DIGEST_NAMES
+            self.notify("Bills Due Soon", f"{len(bills)} bills due: {names}{f' and {more} more' if more > 0 else ''}")
+
+@lru_cache(maxsize=None)
+def pie_chart_classes():
+    # kivy_garden.graph is optional; whether it imports is looked up once
+    try:
+        from kivy_garden.graph import Graph, PiePlot
+    except ImportError:
+        return None
+    return Graph, PiePlot
+
+
+class SummaryScreen(NotifyMixin, Screen):
+    range_names = SUMMARY_RANGES
+    range_name = 'All Time'
+    custom_range = None
+    summary_version = None
+    chart = None
+    chart_plot = None
+    chart_label = None
+
+    def select_range(self, name):
+        if name == 'Custom':
+            self.open_custom_range_popup()
+            return
+        self.range_name = name
+        self.on_enter()
+
+    def open_custom_range_popup(self):
         try:
-            for callback in self.notification_callbacks:
-                Clock.unschedule(callback)
-            self.notification_callbacks = []
-            today = datetime.datetime.now()
-            for bill in self.bills:
-                if bill['paid']:
-                    continue
+            content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+            popup = Popup(title="Custom Range", content=content, size_hint=(0.8, 0.5), auto_dismiss=False)
+            first, last = self.custom_range or (None, None)
+            from_input = TextInput(text=first or '', hint_text="From (DD/MM/YYYY)", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
+            to_input = TextInput(text=last or '', hint_text="To (DD/MM/YYYY)", multiline=False, background_color=(1, 1, 1, 0.1), foreground_color=(1, 1, 1, 1))
+            error_label = Label(text="", color=(1, 0.4, 0.4, 1))
+            apply_btn = Button(text="Apply", size_hint_y=None, height=40, background_normal='', background_color=(0.2, 0.7, 0.7, 1))
+            cancel_btn = Button(text="Cancel", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            for widget in (from_input, to_input, error_label, apply_btn, cancel_btn):
+                content.add_widget(widget)
+
+            def apply_range(*args):
                 try:
-                    due_date = datetime.datetime.strptime(bill['due'], '%d/%m/%Y')
-                    if due_date > today:
-                        def callback(dt, b=bill):
-                            self.notify("Bill Due Soon", f"{b['name']} due on {b['due']}")
-                        delta = (due_date - today).total_seconds()
-                        if delta > 0:
-                            Clock.schedule_once(callback, max(delta - 86400, 0))
-                            self.notification_callbacks.append(callback)
+                    low, high = due_ordinal(from_input.text.strip()), due_ordinal(to_input.text.strip())
                 except ValueError:
-                    self.notify("Notification Error", f"Invalid date for {bill['name']}")
-        except Exception as e:
-            self.notify("Error", f"Failed to schedule notifications: {str(e)}")
-            log_crash(e, source="schedule_notifications")
+                    error_label.text = "Use dates like 01/01/2025"
+                    return
+                if low > high:
+                    error_label.text = "The start date is after the end date"
+                    return
+                popup.dismiss()
+                self.custom_range = (from_input.text.strip(), to_input.text.strip())
+                self.range_name = 'Custom'
+                self.on_enter()
 
-    def notify(self, title, message):
-        try:
-            notification.notify(title=title, message=message, timeout=5)
-        except Exception as e:
-            print(f"[ERROR] Notification failed: {str(e)}")
-            self.show_toast(message)
+            def cancel(*args):
+                popup.dismiss()
+                # Put the spinner back on the range still being shown
+                self.ids.range_spinner.text = self.range_name
 
-    def show_toast(self, message):
+            apply_btn.bind(on_release=apply_range)
+            cancel_btn.bind(on_release=cancel)
+            popup.open()
+        except Exception as e:
+            self.notify("Error", f"Failed to open custom range: {str(e)}")
+            log_crash(e, source="open_custom_range_popup")
+
+    def analytics_lines(self, view, today):
+        cube = self.manager.get_screen('main').analytics
+        symbol = App.get_running_app().currency_symbol
+        if view == 'Monthly Trend':
+            months = today.year * 12 + today.month - ANALYTICS_TREND_MONTHS
+            first = (months // 12, months % 12 + 1)
+            lines = []
+            previous = None
+            for (year, month), cell in cube.month_trend(first, (today.year, today.month)):
+                change = ""
+                if previous:
+                    change = f" ({(cell.total_minor - previous) * 100 / previous:+.0f}%)"
+                lines.append(f"{datetime.date(year, month, 1).strftime('%b %Y')}: {symbol}{cell.total_minor / 100:.2f}"
+                             f"{change}, {symbol}{cell.unpaid_minor / 100:.2f} unpaid")
+                previous = cell.total_minor
+            return f"Last {ANALYTICS_TREND_MONTHS} months", lines
+        if view.startswith('Forecast'):
+            months = 12 if view == 'Forecast: 12 Months' else 60
+            forecast = CashFlowForecast(business_days, today.toordinal(), months).project(self.manager.get_screen('main').ledger)
+            if months == 12:
+                lines = [f"{datetime.date(year, month, 1).strftime('%b %Y')}: {symbol}{amount / 100:.2f}"
+                         for (year, month), amount in forecast['months']]
+            else:
+                years = defaultdict(int)
+                for (year, month), amount in forecast['months']:
+                    years[year] += amount
+                lines = [f"{year}: {symbol}{amount / 100:.2f}" for year, amount in sorted(years.items())]
+            lines += [f"{BILL_CATEGORIES.get(category, '💸')} {category}: {symbol}{amount / 100:.2f}"
+                      for category, amount in forecast['categories']]
+            return f"{forecast['count']} recurring payments, {symbol}{forecast['total'] / 100:.2f}", lines
+        if view == 'Top Categories':
+            rows = cube.top_categories()
+            return "All time", [
+                f"{rank}. {BILL_CATEGORIES.get(category, '💸')} {category}: {symbol}{cell.total_minor / 100:.2f} ({cell.count} bills)"
+                for rank, (category, cell) in enumerate(rows, 1)]
+        rows = cube.category_breakdown((today.year, 1), (today.year, 12))
+        grand = sum(cell.total_minor for _, cell in rows)
+        return str(today.year), [
+            f"{BILL_CATEGORIES.get(category, '💸')} {category}: {symbol}{cell.total_minor / 100:.2f} "
+            f"({cell.total_minor * 100 / (grand or 1):.0f}%), {cell.count} bills, {symbol}{cell.unpaid_minor / 100:.2f} unpaid"
+            for category, cell in rows]
+
+    def open_analytics_popup(self):
         try:
-            toast = Popup(
-                title='',
-                content=Label(text=message, color=(1, 1, 1, 1)),
-                size_hint=(0.8, 0.2),
-                pos_hint={'center_x': 0.5, 'top': 0.9},
-                auto_dismiss=True
-            )
-            toast.open()
-            Clock.schedule_once(lambda dt: toast.dismiss(), 2)
+            content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+            popup = Popup(title="Analytics", content=content, size_hint=(0.95, 0.8))
+            view_spinner = Spinner(text=ANALYTICS_VIEWS[0], values=ANALYTICS_VIEWS, size_hint_y=None, height=40,
+                                   background_color=(0.2, 0.6, 0.6, 1))
+            period_label = Label(text="", size_hint_y=None, height=30, color=(1, 1, 1, 1))
+            rows_label = Label(text="", halign='left', valign='top', color=(1, 1, 1, 1))
+            rows_label.bind(size=lambda label, size: setattr(label, 'text_size', size))
+            close_btn = Button(text="Close", size_hint_y=None, height=40, background_normal='', background_color=(0.5, 0.5, 0.5, 1))
+            for widget in (view_spinner, period_label, rows_label, close_btn):
+                content.add_widget(widget)
+
+            def show_view(spinner, view):
+                period, lines = self.analytics_lines(view, datetime.date.today())
+                period_label.text = period
+                rows_label.text = '\n'.join(lines) or "No bills to analyse"
+
+            view_spinner.bind(text=show_view)
+            close_btn.bind(on_release=lambda x: popup.dismiss())
+            show_view(view_spinner, view_spinner.text)
+            popup.open()
         except Exception as e:
-            print(f"[ERROR] Toast failed: {str(e)}")
-            log_crash(e, source="show_toast")
+            self.notify("Error", f"Failed to open analytics: {str(e)}")
+            log_crash(e, source="open_analytics_popup")
+
+    def range_bounds(self, today):
+        if self.range_name == 'Custom':
+            return (due_ordinal(self.custom_range[0]), due_ordinal(self.custom_range[1])) if self.custom_range else None
+        return summary_range(self.range_name, today)
 
-class SummaryScreen(Screen):
     def on_enter(self):
         try:
-            today = datetime.datetime.now()
-            total_paid = sum(float(b['amount']) for b in self.manager.get_screen('main').bills if b['paid'])
-            total_remaining = sum(float(b['amount']) for b in self.manager.get_screen('main').bills if not b['paid'])
-            overdue = sum(
-                float(b['amount']) for b in self.manager.get_screen('main').bills
-                if not b['paid'] and datetime.datetime.strptime(b['due'], '%d/%m/%Y') < today
-            )
-
+            main_screen = self.manager.get_screen('main')
+            today = datetime.date.today()
+            bounds = self.range_bounds(today)
+            # Picking 'Custom' again in the spinner is not a change, so the
+            # dates are reopened from their own button
+            custom = self.range_name == 'Custom'
+            self.ids.edit_range.opacity = 1 if custom else 0
+            self.ids.edit_range.disabled = not custom
             currency_symbol = App.get_running_app().currency_symbol
+            # Everything shown follows from these; the ledger version moves on every edit
+            version = (main_screen.ledger.version, bounds, today, currency_symbol)
+            if version == self.summary_version:
+                return
+            if bounds is None:
+                paid_minor, unpaid_minor, overdue_minor = main_screen.summary_totals.totals(today.toordinal())
+                self.ids.range_dates.text = ""
+            else:
+                paid_minor, unpaid_minor, overdue_minor = main_screen.range_totals.totals(*bounds, today.toordinal())
+                first, last = (datetime.date.fromordinal(o).strftime('%d/%m/%Y') for o in bounds)
+                self.ids.range_dates.text = f"{first} - {last}"
+            total_paid = paid_minor / 100
+            total_remaining = unpaid_minor / 100
+            overdue = overdue_minor / 100
+
             self.ids.total_paid.text = f"Total Paid: {currency_symbol}{total_paid:.2f}"
             self.ids.total_remaining.text = f"Total Remaining: {currency_symbol}{total_remaining:.2f}"
             self.ids.overdue.text = f"Overdue: {currency_symbol}{overdue:.2f}"
 
-            container = self.ids.chart_container
-            container.clear_widgets()
             try:
-                from kivy_garden.graph import Graph, PiePlot
-                graph = Graph(
-                    xlabel='', ylabel='', x_ticks_minor=0, x_ticks_major=0,
-                    y_ticks_major=0, y_grid_label=False, x_grid_label=False, padding=5
-                )
-                total = total_paid + total_remaining + overdue
-                if total > 0:
-                    plot = PiePlot()
-                    plot.points = [
-                        (total_paid, (0.3, 0.7, 0.3, 1)),
-                        (total_remaining, (1, 0.4, 0.4, 1)),
-                        (overdue, (1, 0.2, 0.2, 1))
-                    ]
-                    plot.labels = ['Paid', 'Remaining', 'Overdue']
-                    graph.add_plot(plot)
-                    container.add_widget(graph)
-                else:
-                    container.add_widget(Label(text="No data to display"))
-            except ImportError:
-                container.add_widget(Label(text="Pie chart unavailable (install kivy-garden.graph)"))
+                self.update_chart(total_paid, total_remaining, overdue)
             except Exception as e:
-                container.add_widget(Label(text=f"Chart error: {str(e)}"))
+                self.show_chart_widget(self.chart_message(f"Chart error: {str(e)}"))
                 log_crash(e, source="summary_chart")
+            self.summary_version = version
         except Exception as e:
             self.notify("Error", f"Failed to load summary: {str(e)}")
             log_crash(e, source="summary_on_enter")
 
-    def notify(self, title, message):
-        try:
-            notification.notify(title=title, message=message, timeout=5)
-        except Exception as e:
-            print(f"[ERROR] Notification failed: {str(e)}")
-            self.show_toast(message)
-
-    def show_toast(self, message):
-        try:
-            toast = Popup(
-                title='',
-                content=Label(text=message, color=(1, 1, 1, 1)),
-                size_hint=(0.8, 0.2),
-                pos_hint={'center_x': 0.5, 'top': 0.9},
-                auto_dismiss=True
-            )
-            toast.open()
-            Clock.schedule_once(lambda dt: toast.dismiss(), 2)
-        except Exception as e:
-            print(f"[ERROR] Toast failed: {str(e)}")
-            log_crash(e, source="summary_show_toast")
+    def update_chart(self, total_paid, total_remaining, overdue):
+        # The graph and its plot are built once and only their points change
+        chart_classes = pie_chart_classes()
+        if chart_classes is None:
+            widget = self.chart_message("Pie chart unavailable (install kivy-garden.graph)")
+        elif total_paid + total_remaining + overdue > 0:
+            if self.chart is None:
+                Graph, PiePlot = chart_classes
+                graph = Graph(
+                    xlabel='', ylabel='', x_ticks_minor=0, x_ticks_major=0,
+                    y_ticks_major=0, y_grid_label=False, x_grid_label=False, padding=5
+                )
+                plot = PiePlot()
+                plot.labels = ['Paid', 'Remaining', 'Overdue']
+                graph.add_plot(plot)
+                self.chart, self.chart_plot = graph, plot
+            self.chart_plot.points = [
+                (total_paid, (0.3, 0.7, 0.3, 1)),
+                (total_remaining, (1, 0.4, 0.4, 1)),
+                (overdue, (1, 0.2, 0.2, 1))
+            ]
+            widget = self.chart
+        else:
+            widget = self.chart_message("No data to display")
+        self.show_chart_widget(widget)
+
+    def chart_message(self, text):
+        if self.chart_label is None:
+            self.chart_label = Label()
+        self.chart_label.text = text
+        return self.chart_label
+
+    def show_chart_widget(self, widget):
+        container = self.ids.chart_container
+        if container.children != [widget]:
+            container.clear_widgets()
+            container.add_widget(widget)
 
 class BillsManagerApp(App):
     theme = 'dark'
     currency_symbol = CURRENCY_SYMBOL
 
     def build(self):
+        global storage
         try:
+            storage = open_storage()
             return Builder.load_string(KV)
         except Exception as e:
             log_crash(e, source="app_build")
             raise
 
+    def on_pause(self):
+        return True
+
+    def on_resume(self):
+        try:
+            self.root.get_screen('main').catch_up_reminders()
+        except Exception as e:
+            log_crash(e, source="on_resume")
+
     def switch_theme(self):
         try:
             self.theme = 'light' if self.theme == 'dark' else 'dark'
@@ -2633,8 +4360,12 @@ class BillsManagerApp(App):
                                 widget.background_color = get_color_from_hex('#994433') if self.theme == 'dark' else get_color_from_hex('#CC8866')
                             elif widget.text == 'Backup':
                                 widget.background_color = get_color_from_hex('#669933') if self.theme == 'dark' else get_color_from_hex('#99CC66')
+                            elif widget.text == 'Export':
+                                widget.background_color = get_color_from_hex('#336699') if self.theme == 'dark' else get_color_from_hex('#6699CC')
                             elif widget.text == 'Import':
                                 widget.background_color = get_color_from_hex('#555555') if self.theme == 'dark' else get_color_from_hex('#AAAAAA')
+                            elif widget.text == 'Analytics':
+                                widget.background_color = get_color_from_hex('#996633') if self.theme == 'dark' else get_color_from_hex('#CC9966')
                             elif widget.text == 'Back to Bills':
                                 widget.background_color = get_color_from_hex('#339999') if self.theme == 'dark' else get_color_from_hex('#66CCCC')
                             widget.color = get_color_from_hex('#FFFFFF') if self.theme == 'dark' else get_color_from_hex('#000000')
@@ -2652,5 +4383,4 @@ if __name__ == '__main__':
         BillsManagerApp().run()
     except Exception as e:
         log_crash(e, source="main")
->>>>>>> 2236f7403afea9c04d42e452084cbce71a7a0fb1
-        raise
\ No newline at end of file
+        raise
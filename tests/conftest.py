@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Kivy would otherwise read pytest's own arguments as its command line
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,44 @@
+import datetime
+import time
+
+from kivy.clock import Clock
+
+from main import Bill, ReminderScheduler, new_bill_id, reminder_time
+
+
+def bill_due_in(days):
+    due = datetime.date.today() + datetime.timedelta(days=days)
+    return Bill(new_bill_id(), "Gas", 4550, False, due.toordinal(), "Utilities")
+
+
+def fire_pending():
+    # The arm trigger runs on one tick and the zero-delay fire on the next
+    Clock.tick()
+    Clock.tick()
+
+
+def test_bill_added_after_catch_up_is_reminded():
+    fired = []
+    reminders = ReminderScheduler(fired.append)
+    reminders.discard_until(time.time())
+    bill = bill_due_in(1)
+    reminders.add(bill)
+    assert (bill.id, 'due_soon') in reminders.entries
+    fire_pending()
+    assert fired == [[(bill.id, 'due_soon')]]
+
+
+def test_reload_does_not_refire_delivered_reminder():
+    fired = []
+    reminders = ReminderScheduler(fired.append)
+    bill = bill_due_in(1)
+    reminders.add(bill)
+    fire_pending()
+    assert len(fired) == 1
+    # A ledger reload clears the index and adds every bill again
+    reminders.clear()
+    reminders.add(bill)
+    fire_pending()
+    assert len(fired) == 1
+    assert (bill.id, 'due_soon', reminder_time(bill)) in reminders.delivered
+